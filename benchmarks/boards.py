@@ -0,0 +1,79 @@
+"""
+Moves per second of the board backends in random playouts.
+
+    python -m benchmarks.boards --boardsize 19 --games 20
+"""
+
+import argparse
+import random
+import time
+
+from pygoban.board import BOARDS
+from pygoban.move import Move
+from pygoban.status import BLACK, get_othercolor
+
+
+def playout(board, rand, maxmoves):
+    """
+    Random legal moves without filling own eyes or repeating a position (that
+    includes retaking a ko). Returns (moves, seconds)
+    """
+    color = BLACK
+    moves = 0
+    passes = 0
+    played = 0.0
+    seen = {board.hash}
+    while passes < 2 and moves < maxmoves:
+        mask = board.legal_mask(color)
+        candidates = [
+            divmod(index, board.boardsize) for index, legal in enumerate(mask) if legal
+        ]
+        rand.shuffle(candidates)
+        for pos in candidates:
+            if all(status == color for status in board.adjacent_ins(pos).values()):
+                continue
+            if board.hash_after(pos, color) in seen:
+                continue
+            start = time.perf_counter()
+            board.apply_result(board.result(Move(color, pos)))
+            played += time.perf_counter() - start
+            seen.add(board.hash)
+            moves += 1
+            passes = 0
+            break
+        else:
+            passes += 1
+        color = get_othercolor(color)
+    return moves, played
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--boardsize", type=int, default=19)
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--board", choices=tuple(BOARDS), action="append", help="Default: all"
+    )
+    args = parser.parse_args()
+    maxmoves = 3 * args.boardsize * args.boardsize
+    for name in args.board or BOARDS:
+        rand = random.Random(args.seed)
+        moves = 0
+        played = 0.0
+        start = time.perf_counter()
+        for _ in range(args.games):
+            game_moves, game_played = playout(
+                BOARDS[name](args.boardsize), rand, maxmoves
+            )
+            moves += game_moves
+            played += game_played
+        total = time.perf_counter() - start
+        print(
+            f"{name:6} {moves:7} moves  {moves / played:9.0f} moves/s (play)"
+            f"  {moves / total:9.0f} moves/s (with move generation)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Memory of a parsed SGF tree with many variations, in bytes per node.
+
+    python -m benchmarks.move_tree --nodes 20000
+"""
+
+import argparse
+import logging
+import random
+import tracemalloc
+
+from pygoban.coords import pos_to_sgf
+from pygoban.game import Game
+from pygoban.sgf import reader
+
+
+def generate(nodes, rand, boardsize=19, comments=0.1):
+    """SGF of a random tree: every new node is added below a random node"""
+    children = [[]]
+    depths = [0]
+    moves = [""]
+    used = [frozenset()]
+    while len(children) <= nodes:
+        parent = rand.randrange(len(children))
+        pos = pos_to_sgf((rand.randrange(boardsize), rand.randrange(boardsize)))
+        if pos in used[parent]:
+            continue
+        used[parent] |= {pos}
+        children[parent].append(len(children))
+        children.append([])
+        depths.append(depths[parent] + 1)
+        color = "B" if depths[-1] % 2 else "W"
+        comment = "C[A comment]" if rand.random() < comments else ""
+        moves.append(f";{color}[{pos}]{comment}")
+        used.append(used[parent] | {pos})
+
+    parts = [f"(;SZ[{boardsize}]"]
+    stack = [0]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+            continue
+        parts.append(moves[item])
+        if len(children[item]) == 1:
+            stack.append(children[item][0])
+        else:
+            for child in reversed(children[item]):
+                stack.extend((")", child, "("))
+    parts.append(")")
+    return "".join(parts)
+
+
+def count_nodes(root):
+    count = 0
+    stack = [root]
+    while stack:
+        move = stack.pop()
+        count += 1
+        stack.extend(move.children.values())
+    return count - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    sgf = generate(args.nodes, random.Random(args.seed))
+
+    tracemalloc.start()
+    game: Game = reader.parse(sgf, {})
+    game.checkpoints.clear()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    nodes = count_nodes(game.root)
+    print(f"{nodes} nodes  {used / nodes:.0f} bytes/node  {used / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Games per minute and moves per second of headless random self-play.
+
+    python -m benchmarks.selfplay --boardsize 9 --games 1000
+"""
+
+import argparse
+import time
+
+from pygoban.board import BOARDS
+from pygoban.simulation import RandomMoves, run_games
+from pygoban.status import BLACK, WHITE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--boardsize", type=int, default=9)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--processes", type=int, help="Default: all cores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--board", choices=tuple(BOARDS), default="list")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    results = run_games(
+        args.games,
+        RandomMoves(),
+        RandomMoves(),
+        processes=args.processes,
+        seed=args.seed,
+        boardsize=args.boardsize,
+        board=args.board,
+    )
+    total = time.perf_counter() - start
+    moves = sum(result.moves for result in results)
+    wins = {
+        color: sum(result.color is color for result in results)
+        for color in (BLACK, WHITE)
+    }
+    print(
+        f"{len(results)} games  {len(results) * 60 / total:.0f} games/min"
+        f"  {moves / total:.0f} moves/s  B {wins[BLACK]} W {wins[WHITE]}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,14 @@ def get_argparser():
     parser.add_argument("--white-gtp", help="White GTP")
     parser.add_argument("--handicap", help="Handicap", type=int, default=0)
     parser.add_argument("--boardsize", help="Handicap", type=int)
+    parser.add_argument(
+        "--board", help="Board backend", choices=("list", "array"), default="list"
+    )
+    parser.add_argument(
+        "--ruleset",
+        help="Default: the RU of the sgf file",
+        choices=("default", "japanese", "chinese", "aga"),
+    )
     parser.add_argument(
         "--mode", help="Modus(play, edit)", choices=("PLAY", "EDIT"), default="PLAY"
     )
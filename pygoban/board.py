@@ -1,12 +1,48 @@
+import random
+from array import array
+from contextlib import contextmanager
 from copy import deepcopy
 from dataclasses import dataclass, field
-from typing import Optional, Set, Tuple, Dict
+from typing import Any, Callable, Iterator, List, Optional, Set, Tuple, Dict
 from .coords import letter_from_int
 from .move import Move
-from .status import EMPTY, Status
+from .status import BLACK, EMPTY, STATUS, STONE_COLORS, WHITE, Status
 from . import Result, Pos
 
 
+NEIGHBORS: Dict[int, Dict[Pos, Tuple[Pos, ...]]] = {}
+"""Adjacent positions per boardsize, computed once and shared by all boards"""
+
+
+def get_neighbors(boardsize) -> Dict[Pos, Tuple[Pos, ...]]:
+    if boardsize not in NEIGHBORS:
+        boardrange = range(boardsize)
+        NEIGHBORS[boardsize] = {
+            Pos(x, y): tuple(
+                Pos(nx, ny)
+                for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                if 0 <= nx < boardsize and 0 <= ny < boardsize
+            )
+            for x in boardrange
+            for y in boardrange
+        }
+    return NEIGHBORS[boardsize]
+
+
+ZOBRIST: Dict[int, Dict[Status, Dict[Pos, int]]] = {}
+"""Random keys per boardsize, color and position. Seeded, so hashes are stable"""
+
+
+def get_zobrist(boardsize) -> Dict[Status, Dict[Pos, int]]:
+    if boardsize not in ZOBRIST:
+        rand = random.Random(f"pygoban-zobrist-{boardsize}")
+        ZOBRIST[boardsize] = {
+            color: {pos: rand.getrandbits(64) for pos in get_neighbors(boardsize)}
+            for color in (BLACK, WHITE)
+        }
+    return ZOBRIST[boardsize]
+
+
 @dataclass
 class MoveResult(Result):
     move: Optional[Move] = None
@@ -14,102 +50,348 @@ class MoveResult(Result):
     killed: Set[Pos] = field(default_factory=set)
     group: Set[Pos] = field(default_factory=set)
     is_new: bool = True
+    journal: Optional[List] = field(default=None, repr=False)
+    """Undo journal while the move is made tentatively (see `Board.make`)"""
+    hash: Optional[int] = None
+    """Zobrist hash of the position after the move"""
     exception = None
 
 
-class Board(list):
+class Chain:
+    """Connected stones of one color and their liberties"""
+
+    __slots__ = ("color", "stones", "libs")
+
+    def __init__(self, color: Status, stones: Set, libs: Set):
+        self.color = color
+        self.stones = stones
+        self.libs = libs
+
+    def __repr__(self):
+        return f"Chain({self.color}, stones={len(self.stones)}, libs={len(self.libs)})"
+
+
+class BaseBoard:
+    """
+    Chains, moves and the undo journal, independent of how the points are stored.
+
+    A backend addresses intersections by its own point keys. It provides
+    `neighbors[point]`, the conversions `_point`/`_pos` between `Pos` and point,
+    raw access with `_status`/`_set_status` and `board[x][y]` rows.
+    """
+
+    boardsize: int
+    neighbors: Any
+    all_points: List
+    """Every point in (x, y) order, the order of `legal_mask`"""
+
     def __init__(self, boardsize):
-        super().__init__()
-        boardrange = range(boardsize)
-        self.extend([[EMPTY for x in boardrange] for y in boardrange])
         self.boardsize = boardsize
+        self.chains: Dict[Any, Chain] = {}
+        """Chain of every stone on the board, updated on each placement/capture"""
+        self._journal: Optional[List[Tuple[Callable, Tuple]]] = None
+        self.zobrist = get_zobrist(boardsize)
+        self.hash = 0
+        """Zobrist hash of the stones on the board (dead or alive)"""
+
+    def _point(self, pos) -> Any:
+        raise NotImplementedError()
+
+    def _pos(self, point) -> Pos:
+        raise NotImplementedError()
+
+    def _status(self, point) -> Status:
+        raise NotImplementedError()
+
+    def _set_status(self, point, status: Status):
+        raise NotImplementedError()
+
+    def _positions(self, points) -> Set[Pos]:
+        return {self._pos(point) for point in points}
 
     def adjacent_ins(self, index) -> Dict[Pos, Status]:
-        adjacents = {}
-        x, y = index
-        if x > 0:
-            adjacents[Pos(x - 1, y)] = self[x - 1][y]
+        return {
+            self._pos(point): self._status(point)
+            for point in self.neighbors[self._point(index)]
+        }
+
+    def chain(self, pos) -> Optional[Chain]:
+        """The chain at `pos`. Stones and liberties are given as point keys"""
+        return self.chains.get(self._point(pos))
 
-        if x < self.boardsize - 1:
-            adjacents[Pos(x + 1, y)] = self[x + 1][y]
+    def _log(self, undo: Callable, *args):
+        if self._journal is not None:
+            self._journal.append((undo, args))
 
-        if y > 0:
-            adjacents[Pos(x, y - 1)] = self[x][y - 1]
+    def _put(self, point, status: Status):
+        old = self._status(point)
+        self._log(self._set_status, point, old)
+        self._set_status(point, status)
+        color = STONE_COLORS.get(status)
+        oldcolor = STONE_COLORS.get(old)
+        if color != oldcolor:
+            self._log(setattr, self, "hash", self.hash)
+            pos = self._pos(point)
+            if oldcolor:
+                self.hash ^= self.zobrist[oldcolor][pos]
+            if color:
+                self.hash ^= self.zobrist[color][pos]
 
-        if y < self.boardsize - 1:
-            adjacents[Pos(x, y + 1)] = self[x][y + 1]
+    def _own(self, point, chain: Optional[Chain]):
+        """Set (or remove) the chain of a stone"""
+        old = self.chains.get(point)
+        if old is None:
+            self._log(self.chains.pop, point, None)
+        else:
+            self._log(self.chains.__setitem__, point, old)
+        if chain is None:
+            del self.chains[point]
+        else:
+            self.chains[point] = chain
 
-        return adjacents
+    def _lib_add(self, chain: Chain, point):
+        if point not in chain.libs:
+            chain.libs.add(point)
+            self._log(chain.libs.discard, point)
+
+    def _lib_discard(self, chain: Chain, point):
+        if point in chain.libs:
+            chain.libs.discard(point)
+            self._log(chain.libs.add, point)
+
+    def _link(self, point, color: Status):
+        """Add a stone to the chains, merging with friendly neighbors"""
+        chain = Chain(color, {point}, set())
+        self._own(point, chain)
+        for npoint in self.neighbors[point]:
+            other = self.chains.get(npoint)
+            if other is None:
+                self._lib_add(chain, npoint)
+            elif other.color != color:
+                self._lib_discard(other, point)
+            elif other is not chain:
+                if len(other.stones) < len(chain.stones):
+                    chain, other = other, chain
+                added = chain.libs - other.libs
+                other.stones |= chain.stones
+                other.libs |= added
+                self._log(other.stones.difference_update, chain.stones)
+                self._log(other.libs.difference_update, added)
+                for stone in chain.stones:
+                    self._own(stone, other)
+                chain = other
+        self._lib_discard(chain, point)
+
+    def _unlink(self, point):
+        """Remove a single stone, splitting its chain if needed"""
+        chain = self.chains[point]
+        for stone in chain.stones:
+            self._own(stone, None)
+        self._add_lib(point)
+        for stone in chain.stones:
+            if stone != point:
+                self._link(stone, chain.color)
+
+    def _add_lib(self, point):
+        """`point` got empty: it is a liberty for all adjacent chains"""
+        for npoint in self.neighbors[point]:
+            if other := self.chains.get(npoint):
+                self._lib_add(other, point)
+
+    def _capture(self, chain: Chain):
+        for stone in chain.stones:
+            self._own(stone, None)
+            self._put(stone, EMPTY)
+        for stone in chain.stones:
+            self._add_lib(stone)
+
+    def _play(self, move) -> MoveResult:
+        point = self._point(move.pos)
+        self.pos(move.pos, move.color)
+        killed = set()
+        for npoint in self.neighbors[point]:
+            chain = self.chains.get(npoint)
+            if chain and chain.color != move.color and not chain.libs:
+                killed |= chain.stones
+                self._capture(chain)
+        chain = self.chains[point]
+        return MoveResult(
+            move=move,
+            group=self._positions(chain.stones),
+            killed=self._positions(killed),
+            libs=self._positions(chain.libs),
+            hash=self.hash,
+        )
 
     def analyze(
-        self,
-        pos: Pos,
-        started: Optional[Set[Pos]] = None,
-        group: Set[Pos] = None,
-        killed: Set[Pos] = None,
-        libs: Set[Pos] = None,
-        findkilled: bool = True,
+        self, pos: Pos, findkilled: bool = True
     ) -> Tuple[Set[Pos], Set[Pos], Set[Pos], Set[Pos], bool]:
         """Analyze from a starting point"""
-        # import pudb; pudb.set_trace()
-        started = started or set()
-        group = group or set()
-        killed = killed or set()
-        libs = libs or set()
-        started.add(pos)
-        group.add(pos)
-        adjacents = self.adjacent_ins(pos)
-        for axy, acol in adjacents.items():
-            if axy in started:
+        point = self._point(pos)
+        chain = self.chains.get(point)
+        if chain is None:
+            group = {point}
+            libs = {
+                npoint for npoint in self.neighbors[point] if npoint not in self.chains
+            }
+        else:
+            group = set(chain.stones)
+            libs = set(chain.libs)
+        killed = set()
+        if findkilled and chain:
+            for npoint in self.neighbors[point]:
+                enemy = self.chains.get(npoint)
+                if enemy and enemy.color != chain.color and not enemy.libs:
+                    killed |= enemy.stones
+            for stone in killed:
+                if not group.isdisjoint(self.neighbors[stone]):
+                    libs.add(stone)
+        group, killed, libs = (self._positions(pts) for pts in (group, killed, libs))
+        return group | libs | killed, group, killed, libs, findkilled
+
+    def legal_mask(self, color: Status) -> bytearray:
+        """
+        1 for every empty point where `color` may play without suicide, indexed by
+        `x * boardsize + y`. Use `numpy.frombuffer(mask, dtype=bool)` for an array.
+        """
+        chains = self.chains
+        neighbors = self.neighbors
+        mask = bytearray(len(self.all_points))
+        for index, point in enumerate(self.all_points):
+            if point in chains:
                 continue
+            for npoint in neighbors[point]:
+                chain = chains.get(npoint)
+                # a liberty, a friend with another liberty or a capture
+                if chain is None or (chain.color == color) == (len(chain.libs) > 1):
+                    mask[index] = 1
+                    break
+        return mask
+
+    def hash_after(self, pos, color: Status) -> int:
+        """Zobrist hash after `color` played at the empty point `pos`"""
+        position_hash = self.hash ^ self.zobrist[color][Pos(*pos)]
+        captured: List[Chain] = []
+        for npoint in self.neighbors[self._point(pos)]:
+            chain = self.chains.get(npoint)
+            if (
+                chain
+                and chain.color != color
+                and len(chain.libs) == 1
+                and chain not in captured
+            ):
+                captured.append(chain)
+                for stone in chain.stones:
+                    position_hash ^= self.zobrist[chain.color][self._pos(stone)]
+        return position_hash
 
-            # a liberty
-            if acol.is_empty():
-                started.add(axy)
-                libs.add(Pos(*axy))
-
-            # friend
-            elif acol.intval == self[pos[0]][pos[1]].intval:
-                started, group, killed, libs = self.analyze(
-                    axy,
-                    started=started,
-                    group=group,
-                    killed=killed,
-                    libs=libs,
-                    findkilled=False,
-                )[:4]
-
-            # enemy!
-            elif findkilled:
-                result = self.analyze(axy, findkilled=False)
-                enemylibs = result[3]
-                if not enemylibs:
-                    enemygroup = result[1]
-                    killed |= enemygroup
-                    started |= enemygroup
-                    killed_adjacents = enemygroup & set(adjacents)
-                    libs |= killed_adjacents
-
-        return started, group, killed, libs, findkilled
+    def snapshot(self) -> bytes:
+        """Status codes of all points, in the order of `all_points`"""
+        return bytes(self._status(point).intval for point in self.all_points)
+
+    @classmethod
+    def from_snapshot(cls, boardsize, snapshot: bytes):
+        board = cls(boardsize)
+        for point, intval in zip(board.all_points, snapshot):
+            if intval:
+                board.pos(board._pos(point), STATUS[intval])
+        return board
+
+    def make(self, move) -> MoveResult:
+        """
+        Play a move tentatively. The changes are recorded in `result.journal`
+        until the move is either taken back with `unmake` or committed with
+        `apply_result`. Nested tentative moves must be unmade in reverse order.
+        """
+        outer, self._journal = self._journal, []
+        try:
+            result = self._play(move)
+            result.journal = self._journal
+        finally:
+            self._journal = outer
+        return result
+
+    def unmake(self, result: MoveResult):
+        """Take back a move played with `make`"""
+        assert result.journal is not None, "Move is not made tentatively"
+        for undo, args in reversed(result.journal):
+            undo(*args)
+        result.journal = None
+
+    @contextmanager
+    def try_move(self, move) -> Iterator[MoveResult]:
+        """The board shows the position after `move` inside the with-block"""
+        result = self.make(move)
+        try:
+            yield result
+        finally:
+            if result.journal is not None:
+                self.unmake(result)
 
     def result(self, move):
         """Result of a move (may be invalid)"""
-        x, y = move.pos
-        cpy = deepcopy(self)
-        cpy[x][y] = move.color
-        raw = cpy.analyze((x, y))
-        result = MoveResult(
-            move=move,
-            group=raw[1],
-            killed=raw[2],
-            libs=raw[3],
-        )
+        result = self.make(move)
+        self.unmake(result)
         return result
 
     def apply_result(self, result):
-        self.pos(result.move.pos, result.move.color)
-        for pos in result.killed:
-            self.pos(pos, EMPTY)
+        if result.journal is not None:
+            # already made tentatively, just keep it
+            result.journal = None
+        else:
+            self._play(result.move)
+
+    def pos(self, pos, status=None):
+        point = self._point(pos)
+        if status:
+            color = STONE_COLORS.get(status)
+            if color != STONE_COLORS.get(self._status(point)):
+                if point in self.chains:
+                    self._unlink(point)
+                if color:
+                    self._link(point, color)
+            self._put(point, status)
+        return self._status(point)
+
+    def __str__(self):
+        txt = "\n    "
+        txt += " ".join([letter_from_int(i) for i in range(self.boardsize)])
+        txt += "\n\n"
+        for xorg in range(self.boardsize):
+            x = self.boardsize - xorg - 1
+            txt += "%2s  " % (x + 1)
+            txt += " ".join(
+                ["%s" % (self[xorg][y]).short() for y in range(self.boardsize)]
+            )
+            txt += "\n"
+
+        return txt
+
+
+class Board(BaseBoard, list):
+    """Rows of `Status` objects, addressed by `Pos`"""
+
+    def __init__(self, boardsize):
+        BaseBoard.__init__(self, boardsize)
+        boardrange = range(boardsize)
+        self.extend([[EMPTY for x in boardrange] for y in boardrange])
+        self.neighbors = get_neighbors(boardsize)
+        self.all_points = list(self.neighbors)
+
+    def _point(self, pos):
+        return Pos(*pos)
+
+    def _pos(self, point):
+        return point
+
+    def _positions(self, points):
+        return set(points)
+
+    def _status(self, point):
+        return self[point[0]][point[1]]
+
+    def _set_status(self, point, status):
+        self[point[0]][point[1]] = status
 
     def rotated(self, switch_axis=False, switch_x=False, switch_y=False):
         if not any((switch_axis, switch_x, switch_y)):
@@ -131,23 +413,99 @@ class Board(list):
 
         return cpy
 
-    def pos(self, pos, status=None):
-        x, y = pos
-        if status:
-            self[x][y] = status
-        return self[x][y]
 
-    def __str__(self):
-        cpy = self.rotated(switch_axis=False, switch_y=False)
-        txt = "\n    "
-        txt += " ".join([letter_from_int(i) for i in range(cpy.boardsize)])
-        txt += "\n\n"
-        for xorg in range(cpy.boardsize):
-            x = cpy.boardsize - xorg - 1
-            txt += "%2s  " % (x + 1)
-            txt += " ".join(
-                ["%s" % (cpy[xorg][y]).short() for y in range(cpy.boardsize)]
+OFFBOARD = 7
+"""Status code of the sentinel border of an `ArrayBoard`"""
+
+ARRAY_TABLES: Dict[int, Tuple] = {}
+"""Neighbor indexes, positions and on-board indexes per boardsize, shared"""
+
+
+def get_array_tables(boardsize):
+    if boardsize not in ARRAY_TABLES:
+        width = boardsize + 2
+        positions: List[Optional[Pos]] = [None] * (width * width)
+        for x in range(boardsize):
+            for y in range(boardsize):
+                positions[(x + 1) * width + y + 1] = Pos(x, y)
+        neighbors = [
+            (
+                tuple(
+                    nindex
+                    for nindex in (index - width, index + width, index - 1, index + 1)
+                    if positions[nindex] is not None
+                )
+                if pos is not None
+                else ()
             )
-            txt += "\n"
+            for index, pos in enumerate(positions)
+        ]
+        all_points = [index for index, pos in enumerate(positions) if pos is not None]
+        ARRAY_TABLES[boardsize] = neighbors, positions, all_points
+    return ARRAY_TABLES[boardsize]
 
-        return txt
+
+class ArrayRow:
+    """`board[x]` of an `ArrayBoard`, so `board[x][y]` works like for a `Board`"""
+
+    __slots__ = ("board", "offset")
+
+    def __init__(self, board, x):
+        self.board = board
+        self.offset = (x + 1) * board.width + 1
+
+    def __getitem__(self, y):
+        return STATUS[self.board.points[self.offset + y]]
+
+    def __setitem__(self, y, status):
+        self.board.points[self.offset + y] = status.intval
+
+    def __len__(self):
+        return self.board.boardsize
+
+    def __iter__(self):
+        points = self.board.points
+        return (STATUS[points[self.offset + y]] for y in range(self.board.boardsize))
+
+
+class ArrayBoard(BaseBoard):
+    """
+    Status codes in a flat `array('b')` with a sentinel border.
+    Points are indexes into that array. An alternative to `Board`
+    (`--board array`), `benchmarks/boards.py` compares them.
+    """
+
+    def __init__(self, boardsize):
+        super().__init__(boardsize)
+        self.width = boardsize + 2
+        self.neighbors, self.positions, self.all_points = get_array_tables(boardsize)
+        self.points = array(
+            "b",
+            (OFFBOARD if pos is None else EMPTY.intval for pos in self.positions),
+        )
+
+    def _point(self, pos):
+        return (pos[0] + 1) * self.width + pos[1] + 1
+
+    def _pos(self, point):
+        return self.positions[point]
+
+    def _status(self, point):
+        return STATUS[self.points[point]]
+
+    def _set_status(self, point, status):
+        self.points[point] = status.intval
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.boardsize:
+            raise IndexError(x)
+        return ArrayRow(self, x)
+
+    def __len__(self):
+        return self.boardsize
+
+    def __iter__(self):
+        return (ArrayRow(self, x) for x in range(self.boardsize))
+
+
+BOARDS = {"list": Board, "array": ArrayBoard}
@@ -0,0 +1,60 @@
+import sys
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from .move import Move
+
+
+CHECKPOINT_OVERHEAD = 200
+"""Estimated bytes per checkpoint besides the snapshot (tuples, dict entry)"""
+
+
+class Checkpoint(NamedTuple):
+    snapshot: bytes
+    prisoners: Tuple[int, int]
+    ko: Optional[Tuple[int, int]]
+
+
+class Checkpoints:
+    """
+    Board snapshots after every `interval`-th move of the visited paths, so
+    setting the cursor only replays the moves after the nearest checkpoint.
+    The least recently used checkpoints are dropped above `max_bytes`.
+    """
+
+    def __init__(self, interval: int = 16, max_bytes: int = 16 * 1024 * 1024):
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._cache: "OrderedDict[Move, Tuple[Checkpoint, int]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, move):
+        return move in self._cache
+
+    def nearest(self, path: List[Move]) -> Tuple[int, Optional[Checkpoint]]:
+        """The deepest checkpoint on `path` and the number of moves it covers"""
+        last = len(path) - len(path) % self.interval
+        for depth in range(last, 0, -self.interval):
+            if entry := self._cache.get(path[depth - 1]):
+                self._cache.move_to_end(path[depth - 1])
+                return depth, entry[0]
+        return 0, None
+
+    def wanted(self, depth: int, move: Move) -> bool:
+        return depth % self.interval == 0 and move not in self._cache
+
+    def add(self, move: Move, checkpoint: Checkpoint):
+        size = sys.getsizeof(checkpoint.snapshot) + CHECKPOINT_OVERHEAD
+        if move in self._cache:
+            self.used -= self._cache.pop(move)[1]
+        self._cache[move] = checkpoint, size
+        self.used += size
+        while self.used > self.max_bytes:
+            self.used -= self._cache.popitem(last=False)[1][1]
+
+    def clear(self):
+        self._cache.clear()
+        self.used = 0
@@ -94,8 +94,9 @@ class ControllerMixin(GameListenerMixin):
     def _play(self, color, pos):
         self.game_callback("play", color=color, pos=pos)
 
-    def to_sgf(self):
-        return to_sgf(self.infos, self.root)
+    def to_sgf(self, fp=None):
+        """The sgf text, or None if it was written to `fp`"""
+        return to_sgf(self.infos, self.root, fp)
 
     def end(self, reason: str, color: Status):
         self.infos["RE"] = f"{color.shortval}+{reason}"
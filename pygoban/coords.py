@@ -1,6 +1,32 @@
+import string
+from typing import Dict, Tuple
+
+from . import Pos
+
+SGF_LETTERS = string.ascii_lowercase + string.ascii_uppercase
+"""SGF coordinates: a-z for 0-25, A-Z for 26-51"""
+
+SGF_INDEXES = {char: index for index, char in enumerate(SGF_LETTERS)}
+
+POSITIONS: Dict[Tuple[int, int], Pos] = {}
+"""Interned positions, shared by all moves"""
+
+
+def intern_pos(pos) -> Pos:
+    try:
+        return POSITIONS[pos]
+    except KeyError:
+        return POSITIONS.setdefault(pos, Pos(*pos))
+
+
 def letter_from_int(val, skip_i=False):
-    summand = 66 if val > 7 and skip_i else 65
-    return chr(summand + val)
+    """Column label: A-Z (without I if `skip_i`), then AA, AB, ... for wide boards"""
+    letters = (
+        string.ascii_uppercase.replace("I", "") if skip_i else string.ascii_uppercase
+    )
+    if val >= len(letters):
+        return letters[val // len(letters) - 1] + letters[val % len(letters)]
+    return letters[val]
 
 
 def char_to_int(char, skip_i=True):
@@ -23,10 +49,8 @@ def gtp_coords(x, y, boardsize):
 
 
 def sgf_to_pos(coord):
-    return char_to_int(coord[1], False), char_to_int(coord[0], False)
+    return intern_pos((SGF_INDEXES[coord[1]], SGF_INDEXES[coord[0]]))
 
 
 def pos_to_sgf(coord):
-    x = letter_from_int(coord[0])
-    y = letter_from_int(coord[1])
-    return f"{y}{x}".lower()
+    return SGF_LETTERS[coord[1]] + SGF_LETTERS[coord[0]]
@@ -1,53 +1,345 @@
-from typing import Dict
-from .status import Status, BLACK, BLACK_LIB, EMPTY, WHITE, WHITE_LIB
-
-
-def check(x, y, board, checked, group=None):
-    group = group or {"owner": None, "coords": set()}
-    status = board[x][y]
-    if status == EMPTY or status.is_owned():
-        group["coords"].add((x, y))
-        checked.add((x, y))
-    else:
-        if group["owner"] is None:
-            group["owner"] = status
-        elif group["owner"] != status:
-            group["owner"] = False
-    for adj in board.adjacent_ins((x, y)):
-        adx, ady = adj
-        if (adx, ady) in checked:
-            continue
-        if status == EMPTY or status.is_owned():
-            check(adx, ady, board, checked, group)
-    return group
+from array import array
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from .board import BaseBoard, get_neighbors
+from .status import (
+    BLACK,
+    BLACK_LIB,
+    DEAD_BLACK,
+    DEAD_WHITE,
+    EMPTY,
+    STATUS,
+    WHITE,
+    WHITE_LIB,
+    Status,
+    get_othercolor,
+)
+
+INDEX_NEIGHBORS: Dict[int, List[Tuple[int, ...]]] = {}
+"""Neighbors by point index (`x * boardsize + y`) per boardsize"""
+
+EMPTY_CODES = frozenset(int(status) for status in (EMPTY, BLACK_LIB, WHITE_LIB))
+DEAD_CODES = frozenset((int(DEAD_BLACK), int(DEAD_WHITE)))
+OPEN_CODES = EMPTY_CODES | DEAD_CODES
+"""Points that belong to a region: empty points and dead stones"""
+
+
+def get_index_neighbors(boardsize) -> List[Tuple[int, ...]]:
+    if boardsize not in INDEX_NEIGHBORS:
+        INDEX_NEIGHBORS[boardsize] = [
+            tuple(nx * boardsize + ny for nx, ny in neighbors)
+            for neighbors in get_neighbors(boardsize).values()
+        ]
+    return INDEX_NEIGHBORS[boardsize]
+
+
+class Region(NamedTuple):
+    owner: Optional[Status]
+    """The only color of the live stones around, None for dame"""
+    points: Tuple[int, ...]
+    empty: int
+    """Number of empty points, the territory of the owner"""
+
+
+class Territory:
+    """
+    Regions of empty points and dead stones of a position and their owners.
+    Counting reads the status codes of a snapshot, the board is unchanged.
+    Dead stones are points and prisoners for the other color.
+    """
+
+    def __init__(self, boardsize: int, codes: bytes, key: Tuple[int, FrozenSet[int]]):
+        self.boardsize = boardsize
+        self.codes = codes
+        self.key = key
+        """Board hash and the indexes of the dead stones"""
+        self.labels = array("i", [-1]) * (boardsize * boardsize)
+        """Region index of every point, -1 for live stones"""
+        self.regions: List[Optional[Region]] = []
+        self.ownership = bytearray(boardsize * boardsize)
+        """Status code of the owner of every point of a region, 0 for dame"""
+        self.points: Dict[Status, int] = {BLACK: 0, WHITE: 0}
+        """Territory: empty points of the owned regions and dead stones"""
+        self.prisoners: Dict[Status, int] = {BLACK: 0, WHITE: 0}
+        self.stones: Dict[Status, int] = {BLACK: 0, WHITE: 0}
+        """Live stones, for area scoring"""
 
+    @property
+    def dead(self) -> FrozenSet[int]:
+        return self.key[1]
 
-def counted_groups(board):
+    def owner(self, pos) -> Optional[Status]:
+        code = self.ownership[pos[0] * self.boardsize + pos[1]]
+        return STATUS[code] if code else None
+
+    def label(self, seeds):
+        """Flood fill the unlabeled region points of `seeds`, with their owners"""
+        codes = self.codes
+        labels = self.labels
+        ownership = self.ownership
+        neighbors = get_index_neighbors(self.boardsize)
+        for seed in seeds:
+            if labels[seed] != -1 or codes[seed] not in OPEN_CODES:
+                continue
+            index = len(self.regions)
+            labels[seed] = index
+            points = [seed]
+            owners = set()
+            empty = 0
+            stack = [seed]
+            while stack:
+                point = stack.pop()
+                if codes[point] in EMPTY_CODES:
+                    empty += 1
+                for adj in neighbors[point]:
+                    code = codes[adj]
+                    if code in OPEN_CODES:
+                        if labels[adj] == -1:
+                            labels[adj] = index
+                            points.append(adj)
+                            stack.append(adj)
+                    else:
+                        owners.add(code)
+            owner = STATUS[owners.pop()] if len(owners) == 1 else None
+            if owner:
+                for point in points:
+                    ownership[point] = owner.intval
+            self.regions.append(Region(owner, tuple(points), empty))
+
+    def total(self):
+        """Sum up the points and prisoners of the regions and dead stones"""
+        points = {BLACK: 0, WHITE: 0}
+        prisoners = {BLACK: 0, WHITE: 0}
+        for region in self.regions:
+            if region and region.owner:
+                points[region.owner] += region.empty
+        for point in self.dead:
+            color = WHITE if self.codes[point] == DEAD_BLACK.intval else BLACK
+            points[color] += 1
+            prisoners[color] += 1
+        self.points = points
+        self.prisoners = prisoners
+        self.stones = {
+            color: self.codes.count(color.intval) for color in (BLACK, WHITE)
+        }
+
+    def update(self, codes: bytes, key: Tuple[int, FrozenSet[int]]) -> "Territory":
+        """
+        The territory after stones were marked dead or alive. Only the regions
+        at these stones are labeled again.
+        """
+        toggled = self.dead ^ key[1]
+        territory = Territory(self.boardsize, codes, key)
+        territory.labels = array("i", self.labels)
+        territory.regions = list(self.regions)
+        territory.ownership = bytearray(self.ownership)
+        neighbors = get_index_neighbors(self.boardsize)
+        affected = set()
+        for point in toggled:
+            affected.add(self.labels[point])
+            affected.update(self.labels[adj] for adj in neighbors[point])
+        affected.discard(-1)
+        seeds = list(toggled)
+        for index in affected:
+            for point in territory.regions[index].points:
+                territory.labels[point] = -1
+                territory.ownership[point] = 0
+                seeds.append(point)
+            territory.regions[index] = None
+        for point in toggled:
+            territory.labels[point] = -1
+            territory.ownership[point] = 0
+        territory.label(seeds)
+        territory.total()
+        return territory
+
+    def groups(self) -> List[Dict]:
+        """The owned regions as {"owner": .., "coords": {..}}"""
+        return [
+            {
+                "owner": region.owner,
+                "coords": {divmod(point, self.boardsize) for point in region.points},
+            }
+            for region in self.regions
+            if region and region.owner
+        ]
+
+
+def _flood(codes, neighbors, points, inside) -> List[List[int]]:
+    """Connected groups of the `points` with a code in `inside`"""
+    seen = set()
     groups = []
-    boardrange = range(board.boardsize)
-    checked = set()
-    for x in boardrange:
-        for y in boardrange:
-            if board[x][y] in (BLACK_LIB, WHITE_LIB):
-                board[x][y] = EMPTY
-            if (x, y) not in checked:
-                group = check(x, y, board, checked)
-                if group["owner"] and group["coords"]:
-                    groups.append(group)
-
-    points: Dict[Status, int] = {BLACK: 0, WHITE: 0}
-    prisoners: Dict[Status, int] = {BLACK: 0, WHITE: 0}
-    for group in groups:
-        owner = group["owner"]
-        for coord in group["coords"]:
-            x, y = coord
-            if board[x][y] == EMPTY:
-                status = BLACK_LIB if owner == BLACK else WHITE_LIB
-                board[x][y] = status
-                points[owner] += 1
-            else:
-                status = board[x][y]
-            if (not status.is_empty()) and status != owner:
-                prisoners[owner] += 1
-                points[owner] += 1
+    for seed in points:
+        if seed in seen:
+            continue
+        seen.add(seed)
+        group = [seed]
+        stack = [seed]
+        while stack:
+            for adj in neighbors[stack.pop()]:
+                if adj not in seen and codes[adj] in inside:
+                    seen.add(adj)
+                    group.append(adj)
+                    stack.append(adj)
+        groups.append(group)
     return groups
+
+
+def benson(codes: bytes, boardsize: int, color: Status) -> Tuple[Set[int], Set[int]]:
+    """
+    Benson's algorithm: the stones of the chains of `color` that can not be
+    captured, even if `color` passes forever, and the points of the regions
+    they enclose where the opponent can not live (every empty point is a
+    liberty of these chains). Dead stones count as stones.
+    """
+    neighbors = get_index_neighbors(boardsize)
+    own = frozenset((color.intval, color.intval + 2))
+    other = OPEN_CODES - own | {get_othercolor(color).intval}
+    chains = _flood(codes, neighbors, (i for i, c in enumerate(codes) if c in own), own)
+    chain_at = {point: index for index, chain in enumerate(chains) for point in chain}
+    libs = [
+        {
+            adj
+            for point in chain
+            for adj in neighbors[point]
+            if codes[adj] in EMPTY_CODES
+        }
+        for chain in chains
+    ]
+    regions = _flood(
+        codes, neighbors, (i for i, c in enumerate(codes) if c in other), other
+    )
+    borders = []
+    vital: List[Set[int]] = []
+    """Chains every empty point of the region is a liberty of"""
+    for region in regions:
+        border = {
+            chain_at[adj]
+            for point in region
+            for adj in neighbors[point]
+            if adj in chain_at
+        }
+        empty = [point for point in region if codes[point] in EMPTY_CODES]
+        borders.append(border)
+        vital.append(
+            {chain for chain in border if empty and libs[chain].issuperset(empty)}
+        )
+
+    alive = set(range(len(chains)))
+    healthy = set(range(len(regions)))
+    while True:
+        vital_count = dict.fromkeys(alive, 0)
+        for region in healthy:
+            for chain in vital[region] & alive:
+                vital_count[chain] += 1
+        removed = {chain for chain, count_ in vital_count.items() if count_ < 2}
+        if not removed:
+            break
+        alive -= removed
+        healthy = {region for region in healthy if borders[region] <= alive}
+
+    stones = {point for chain in alive for point in chains[chain]}
+    territory = set()
+    for region in healthy:
+        if all(
+            any(adj in stones for adj in neighbors[point])
+            for point in regions[region]
+            if codes[point] in EMPTY_CODES
+        ):
+            territory.update(regions[region])
+    return stones, territory
+
+
+class Settled(NamedTuple):
+    """Pass-alive stones and territory of both colors (see `benson`)"""
+
+    alive: FrozenSet[int]
+    dead: FrozenSet[int]
+    """Stones in the pass-alive territory of the other color"""
+    territory: Dict[Status, FrozenSet[int]]
+
+    def __contains__(self, point):
+        return point in self.alive or point in self.dead
+
+
+def settle(board: BaseBoard) -> Settled:
+    codes = board.snapshot()
+    alive = set()
+    dead = set()
+    territory = {}
+    for color in (BLACK, WHITE):
+        stones, points = benson(codes, board.boardsize, color)
+        alive |= stones
+        dead.update(point for point in points if codes[point] not in EMPTY_CODES)
+        territory[color] = frozenset(points)
+    return Settled(frozenset(alive), frozenset(dead), territory)
+
+
+def position_key(board: BaseBoard) -> Tuple[bytes, Tuple[int, FrozenSet[int]]]:
+    codes = board.snapshot()
+    dead = frozenset(index for index, code in enumerate(codes) if code in DEAD_CODES)
+    return codes, (board.hash, dead)
+
+
+def count(board: BaseBoard) -> Territory:
+    """Label all regions of the position in one pass"""
+    codes, key = position_key(board)
+    territory = Territory(board.boardsize, codes, key)
+    territory.label(range(len(codes)))
+    territory.total()
+    return territory
+
+
+class TerritoryCache:
+    """
+    Counted positions by hash and dead stones. A position that only differs
+    from the last one by dead stones is updated from it.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.last: Optional[Territory] = None
+        self._cache: "OrderedDict[Tuple, Territory]" = OrderedDict()
+        self._settled: "OrderedDict[int, Settled]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def count(self, board: BaseBoard) -> Territory:
+        codes, key = position_key(board)
+        if territory := self._cache.get(key):
+            self._cache.move_to_end(key)
+        elif (
+            self.last
+            and self.last.key[0] == key[0]
+            and self.last.boardsize == board.boardsize
+        ):
+            territory = self.last.update(codes, key)
+        else:
+            territory = Territory(board.boardsize, codes, key)
+            territory.label(range(len(codes)))
+            territory.total()
+        self._cache[key] = territory
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        self.last = territory
+        return territory
+
+    def settle(self, board: BaseBoard) -> Settled:
+        """`settle` for the position, cached by the board hash"""
+        if (settled := self._settled.get(board.hash)) is None:
+            settled = self._settled[board.hash] = settle(board)
+            while len(self._settled) > self.max_entries:
+                self._settled.popitem(last=False)
+        return settled
+
+    def clear(self):
+        self._cache.clear()
+        self._settled.clear()
+        self.last = None
+
+
+def counted_groups(board) -> List[Dict]:
+    """The owned regions of the board (see `Territory.groups`)"""
+    return count(board).groups()
@@ -0,0 +1,157 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import Condition, Thread
+from typing import Deque, Dict, List, Optional, Tuple
+
+from . import logging
+from .events import CursorChanged, Event
+
+IDLE_TIMEOUT = 1.0
+"""Seconds a worker waits for new events before its thread ends"""
+
+
+@dataclass
+class ListenerMetrics:
+    dispatched: int = 0
+    coalesced: int = 0
+    """Events that were merged into a later `CursorChanged`"""
+    failed: int = 0
+    depth: int = 0
+    """Events waiting in the queue"""
+    max_depth: int = 0
+    latency: float = 0.0
+    """Seconds from firing to handling, summed over the dispatched events"""
+    max_latency: float = 0.0
+
+    @property
+    def mean_latency(self):
+        return self.latency / self.dispatched if self.dispatched else 0.0
+
+
+def coalesce(events: List[CursorChanged]) -> CursorChanged:
+    """The last event, with the changed points and the reset of all of them"""
+    last = events[-1]
+    changed: Optional[set] = set()
+    reset = None
+    for event in events:
+        if changed is not None:
+            changed = None if event.changed is None else changed | event.changed
+        reset = event.reset or reset
+    return CursorChanged(
+        cursor=last.cursor,
+        board=last.board,
+        next_player=last.next_player,
+        reset=reset,
+        changed=changed,
+    )
+
+
+class ListenerQueue:
+    """
+    Events of one listener, handled in firing order by a worker thread.
+    The worker is started for the first event and ends after `IDLE_TIMEOUT`
+    without events, so an idle game does not keep the process alive.
+    With `coalesce`, consecutive `CursorChanged` events that queued up while
+    the listener was busy are handled as one.
+    """
+
+    def __init__(self, listener, coalesce=False):
+        self.listener = listener
+        self.coalesce = coalesce
+        self.metrics = ListenerMetrics()
+        self._events: Deque[Tuple[Event, float]] = deque()
+        self._condition = Condition()
+        self._worker: Optional[Thread] = None
+        self._busy = False
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.listener})"
+
+    def put(self, event: Event):
+        with self._condition:
+            self._events.append((event, time.monotonic()))
+            self.metrics.depth = len(self._events)
+            self.metrics.max_depth = max(self.metrics.max_depth, self.metrics.depth)
+            if self._worker is None:
+                self._worker = Thread(target=self._work, name=f"events-{self.listener}")
+                self._worker.start()
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all events are handled, False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._events and not self._busy, timeout
+            )
+
+    def _next(self) -> Optional[Tuple[Event, float]]:
+        """Waits for the next event (or run of events to coalesce)"""
+        with self._condition:
+            self._busy = False
+            self._condition.notify_all()
+            if not self._condition.wait_for(lambda: self._events, IDLE_TIMEOUT):
+                self._worker = None
+                return None
+            event, fired = self._events.popleft()
+            if self.coalesce and isinstance(event, CursorChanged):
+                run = [event]
+                while self._events and isinstance(self._events[0][0], CursorChanged):
+                    run.append(self._events.popleft()[0])
+                if len(run) > 1:
+                    self.metrics.coalesced += len(run) - 1
+                    event = coalesce(run)
+            self.metrics.depth = len(self._events)
+            self._busy = True
+            return event, fired
+
+    def _work(self):
+        while item := self._next():
+            event, fired = item
+            latency = time.monotonic() - fired
+            self.metrics.dispatched += 1
+            self.metrics.latency += latency
+            self.metrics.max_latency = max(self.metrics.max_latency, latency)
+            try:
+                self.listener.handle_game_event(event)
+            except Exception:  # pylint: disable=broad-except
+                # keep the worker, later events are still handled
+                self.metrics.failed += 1
+                logging.exception("%s failed to handle %s", self.listener, event)
+
+
+class Dispatcher:
+    """Delivers game events to the registered listeners, one queue each"""
+
+    def __init__(self):
+        self.queues: List[ListenerQueue] = []
+        self.registrations: Dict[type, List[ListenerQueue]] = {}
+
+    def add_listener(self, instance, event_classes, coalesce=False):
+        queue = next((q for q in self.queues if q.listener is instance), None)
+        if queue is None:
+            queue = ListenerQueue(instance, coalesce=coalesce)
+            self.queues.append(queue)
+        queue.coalesce = queue.coalesce or coalesce
+        for event_class in event_classes:
+            self.registrations.setdefault(event_class, [])
+            if queue not in self.registrations[event_class]:
+                self.registrations[event_class].append(queue)
+
+    def fire(self, event: Event):
+        queues = self.registrations.get(event.__class__, [])
+        logging.debug("FIRE %s ->  %s", event, queues)
+        for queue in queues:
+            queue.put(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every listener handled every fired event"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for queue in self.queues:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not queue.flush(left):
+                return False
+        return True
+
+    def metrics(self) -> Dict[object, ListenerMetrics]:
+        return {queue.listener: queue.metrics for queue in self.queues}
@@ -1,10 +1,12 @@
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 
 from . import board as board_
+from . import counting
 from . import move as move_
 from . import rulesets
+from . import Pos
 from .status import Status
 
 
@@ -23,6 +25,8 @@ class CursorChanged(Event):
     board: board_.Board
     next_player: Optional[Status] = None
     reset: Optional[Reset] = None
+    changed: Optional[Set[Pos]] = None
+    """Points that changed, None if the whole board may have changed"""
 
     def __str__(self):
         return (
@@ -36,6 +40,8 @@ class Counted(Event):
     board: board_.Board
     points: Dict[Status, int] = field(default_factory=dict)
     prisoners: Dict[Status, int] = field(default_factory=dict)
+    territory: Optional[counting.Territory] = None
+    """Owners of the empty points and dead stones, the board has no marks"""
 
 
 @dataclass
@@ -1,14 +1,17 @@
-from threading import Timer
-from typing import Dict, Tuple
+from contextlib import contextmanager
+from typing import Dict, Optional, Set, Tuple, Type
 
-from . import END_BY_RESIGN, logging
-from .board import Board, MoveResult
-from .counting import counted_groups
+from . import END_BY_RESIGN, Pos, logging
+from .board import BaseBoard, Board, MoveResult
+from .checkpoints import Checkpoint, Checkpoints
+from .counting import TerritoryCache
+from .dispatcher import Dispatcher
 from .events import Counted, CursorChanged, Ended, Reset
-from .move import Empty, Move
+from .move import Empty, Move, MoveDiff
 from .rulesets import BaseRuleset, RuleViolation
+from .rulesets.standard import get_ruleset_cls
 from .sgf import INFO_KEYS
-from .status import BLACK, WHITE, Status, get_othercolor
+from .status import BLACK, EMPTY, STONE_COLORS, WHITE, Status, get_othercolor
 
 
 HANDICAPS: Dict[int, Tuple] = {2: ((3, 3), (15, 15))}
@@ -25,14 +28,34 @@ HANDICAPS[9] = HANDICAPS[8] + ((15, 9),)
 
 
 class Game:
-    def __init__(self, **infos):
+    walk_limit = 100
+    """Cursor jumps of up to that many moves use move diffs instead of a replay"""
+
+    def __init__(
+        self,
+        board_cls: Type[BaseBoard] = Board,
+        ruleset_cls: Optional[Type[BaseRuleset]] = None,
+        checkpoints: Optional[Checkpoints] = None,
+        **infos,
+    ):
         self.infos = {k: v for k in INFO_KEYS if (v := infos.get(k))}
-        self.board = Board(int(infos["SZ"]))
-        self.ruleset = BaseRuleset(self)
+        self.board = board_cls(int(infos["SZ"]))
+        self.ruleset = (ruleset_cls or get_ruleset_cls(infos.get("RU")))(self)
+        self.checkpoints = checkpoints or Checkpoints()
+        self.territories = TerritoryCache()
+        self._counted = False
+        """The board has dead stone marks, that move diffs do not cover"""
+        self._overlay = False
+        """The territory of `count` is shown, the next `CursorChanged` updates all"""
         self.prisoners = {BLACK: 0, WHITE: 0}
         self.root = Move(color=None, pos=Empty.ROOT)
+        self.root.hash = self.board.hash
         self._cursor = self.root
-        self.registrations = {}
+        self.dispatcher = Dispatcher()
+        self._batch = 0
+        self._batched = False
+        """A `CursorChanged` was held back by `batch`"""
+        self.ruleset.cursor_changed(self.cursor)
 
     @property
     def boardsize(self):
@@ -59,37 +82,148 @@ class Game:
         for pos in positions:
             self.board.pos(pos, BLACK)
 
-    def add_listener(self, instance, event_classes, wait=False):
-        for event_class in event_classes:
-            self.registrations.setdefault(event_class, [])
-            self.registrations[event_class].append((instance, wait))
+    def add_listener(self, instance, event_classes, coalesce=False):
+        """
+        Events are handled in order in a thread of the listener. A slow
+        listener (like the gui) can `coalesce` the cursor changes it missed.
+        """
+        self.dispatcher.add_listener(instance, event_classes, coalesce=coalesce)
 
     def fire_event(self, event):
-        listeners = self.registrations.get(event.__class__, [])
-        logging.debug("FIRE %s ->  %s", str(event), listeners)
-        for listener, wait in listeners:
-            wait = False
-            if wait:
-                listener.handle_game_event(event)
-            else:
-                Timer(0, lambda: listener.handle_game_event(event)).start()
+        self.dispatcher.fire(event)
+
+    @contextmanager
+    def batch(self):
+        """
+        Fire no `CursorChanged` inside, but one for the whole board at the end
+        if the cursor changed (e.g. while loading a sgf). Can be nested.
+        """
+        self._batch += 1
+        try:
+            yield self
+        finally:
+            self._batch -= 1
+            if not self._batch and self._batched:
+                self._batched = False
+                self._cursor_changed()
+
+    def _cursor_changed(self, reset=None, changed=None):
+        self.ruleset.cursor_changed(self.cursor)
+        if self._batch:
+            self._batched = True
+            return
+        if self._overlay:
+            self._overlay = False
+            changed = None
+        self.fire_event(
+            CursorChanged(
+                next_player=self.nextcolor,
+                cursor=self.cursor,
+                board=self.board,
+                reset=reset,
+                changed=changed,
+            )
+        )
 
     def _set_cursor(self, move, reset=None):
+        changed = None
+        if move is self.cursor:
+            # rebuild, e.g. after the setup stones of the cursor were edited
+            self.checkpoints.clear()
+        else:
+            changed = self._walk(move)
+        if changed is None:
+            self._rebuild(move)
+        self._cursor_changed(reset=reset, changed=changed)
+
+    def _setup_changed(self, replaced=False):
+        """
+        The setup stones of the cursor were edited. Added stones are put on the
+        board and into the diff of the cursor, if stones were `replaced` it is
+        played again from its parent. A cursor with children is rebuilt.
+        """
+        move = self.cursor
+        if move.children or self._counted or (move.parent and not move.diff):
+            self._set_cursor(move)
+            return
+        if not replaced:
+            changes = self._apply_setup(move)
+            changed = {pos for pos, _before, _after in changes}
+            if move.diff:
+                move.diff = move.diff._replace(
+                    changes=move.diff.changes + tuple(changes)
+                )
+            self._set_hash(move)
+        elif before := self._revert_diff(move):
+            self.test_move(move, apply_result=True)
+            changed = before.points | move.diff.points
+        else:
+            self._set_cursor(move)
+            return
+        if move in self.checkpoints:
+            self.checkpoints.add(move, self._checkpoint())
+        self._cursor_changed(changed=changed)
+
+    def _walk(self, move) -> Optional[Set[Pos]]:
+        """
+        Revert the diffs up to the common ancestor of the cursor and `move`, then
+        apply the diffs down to `move`. Returns the changed points, or None if
+        that is too far or a diff does not fit (the board may be changed then).
+        """
+        ancestor = self.cursor.common_ancestor(move)
+        if ancestor is None:
+            return None
+        steps = self.cursor.depth + move.depth - 2 * ancestor.depth
+        if steps > min(move.depth, self.walk_limit):
+            return None
+        down = []
+        while move is not ancestor:
+            down.append(move)
+            move = move.parent
+        changed: Set[Pos] = set()
+        while self.cursor is not ancestor:
+            if (diff := self._revert_diff(self.cursor)) is None:
+                return None
+            changed |= diff.points
+        for move in reversed(down):
+            if (diff := self._apply_diff(move)) is None:
+                return None
+            changed |= diff.points
+        return changed
+
+    def _rebuild(self, move):
+        """Set up the board for `move` from a checkpoint or from scratch"""
         self._cursor = move
+        self._counted = False
         path = self.get_path()
-        self.prisoners = {BLACK: 0, WHITE: 0}
-        self.board = Board(self.board.boardsize)
-        self._set_handicap()
-        self._cursor = self.root
-        for pmove in path:
+        depth, checkpoint = self.checkpoints.nearest(path)
+        if checkpoint:
+            self.board = self.board.from_snapshot(
+                self.board.boardsize, checkpoint.snapshot
+            )
+            self.prisoners = dict(zip((BLACK, WHITE), checkpoint.prisoners))
+            self.ruleset.ko = checkpoint.ko
+            self._cursor = path[depth - 1]
+        else:
+            self.prisoners = {BLACK: 0, WHITE: 0}
+            self.board = self.board.__class__(self.board.boardsize)
+            self._set_handicap()
+            self._apply_setup(self.root)
+            self._set_hash(self.root)
+            self.ruleset.ko = None
+            self._cursor = self.root
+        for pmove in path[depth:]:
             self.test_move(pmove, apply_result=True)
-        event = CursorChanged(
-            next_player=self.nextcolor,
-            cursor=self.cursor,
-            board=self.board,
-            reset=reset,
+            depth += 1
+            if self.checkpoints.wanted(depth, self.cursor):
+                self.checkpoints.add(self.cursor, self._checkpoint())
+
+    def _checkpoint(self) -> Checkpoint:
+        return Checkpoint(
+            self.board.snapshot(),
+            (self.prisoners[BLACK], self.prisoners[WHITE]),
+            self.ruleset.ko,
         )
-        self.fire_event(event)
 
     def test_move(self, move, apply_result=False):
         if child := self.cursor.children.get(move.pos):
@@ -104,10 +238,30 @@ class Game:
             self._apply_result(result)
         return result
 
+    def apply_result(self, result, validate=True):
+        """
+        Play the result of `test_move` like `play`, but without events. The
+        ruleset checks it first: a `RuleViolation` is raised and nothing is
+        played. Superko needs the ruleset to see every move played.
+        """
+        if validate:
+            self.ruleset.validate(result)
+        self._apply_result(result)
+        self.ruleset.cursor_changed(self.cursor)
+
     def _apply_result(self, result):
         move = result.move
+        hash_before = self.board.hash
+        ko_before = self.ruleset.ko
+        changes = []
         if not move.is_empty and move.color:
+            points = (move.pos, *result.killed)
+            before = [self.board.pos(pos) for pos in points]
             self.board.apply_result(result)
+            changes.extend(
+                (pos, status, self.board.pos(pos))
+                for pos, status in zip(points, before)
+            )
             self.prisoners[move.color] += len(result.killed)
         elif move.is_pass:
             if (
@@ -119,16 +273,97 @@ class Game:
                 self.count()
         elif move.pos == Empty.RESIGN:
             self.resign(move.color)
-        if move.extras.has_stones():
-            for status in (BLACK, WHITE):
-                poss = move.extras.stones[status]
-                for pos in poss:
-                    x, y = pos
-                    self.board[x][y] = status
+        changes.extend(self._apply_setup(move))
+        self._set_hash(move)
         if not move.parent:
             move.parent = self.cursor
         if not move.pos == Empty.UNDO:
+            self.ruleset.update_ko(result)
             self._cursor = result.move
+            move.diff = None
+            if not self._counted and move.pos != Empty.RESIGN:
+                move.diff = MoveDiff(
+                    changes=tuple(changes),
+                    prisoners=len(result.killed),
+                    hash_before=hash_before,
+                    ko_before=ko_before,
+                    ko_after=self.ruleset.ko,
+                )
+
+    def _set_hash(self, move):
+        """The hash of the board for `move`, the ruleset learns if it changed"""
+        if move.hash != self.board.hash:
+            changed = move.hash is not None
+            move.hash = self.board.hash
+            if changed:
+                self.ruleset.hash_changed(move)
+
+    def _apply_setup(self, move):
+        """Setup stones (AB, AW, AE) of a node. Returns the changes (see `MoveDiff`)"""
+        changes = []
+        if not move.has_extras:
+            return changes
+        setup = []
+        if move.extras.has_stones():
+            for status in (BLACK, WHITE):
+                setup.extend((pos, status) for pos in move.extras.stones[status])
+        setup.extend((pos, EMPTY) for pos in move.extras.empty)
+        for pos, status in setup:
+            before = self.board.pos(pos)
+            if before != status:
+                self.board.pos(pos, status)
+                changes.append((pos, before, status))
+        return changes
+
+    def _apply_diff(self, move: Move) -> Optional[MoveDiff]:
+        """Step to a child of the cursor with its diff, if it fits the board"""
+        if move.hash is None and move.parent is self.cursor and not self._counted:
+            # not played yet (loaded lazily), playing it computes the diff
+            self.test_move(move, apply_result=True)
+            return move.diff
+        diff = move.diff
+        if diff is None or diff.hash_before != self.board.hash or self._counted:
+            return None
+        for pos, _before, after in diff.changes:
+            self.board.pos(pos, after)
+        if move.color:
+            self.prisoners[move.color] += diff.prisoners
+        self.ruleset.ko = diff.ko_after
+        self._cursor = move
+        return diff
+
+    def _revert_diff(self, move: Move) -> Optional[MoveDiff]:
+        """Step from the cursor `move` to its parent, if its diff fits the board"""
+        diff = move.diff
+        if diff is None or move.hash != self.board.hash or self._counted:
+            return None
+        for pos, before, _after in reversed(diff.changes):
+            self.board.pos(pos, before)
+        if move.color:
+            self.prisoners[move.color] -= diff.prisoners
+        self.ruleset.ko = diff.ko_before
+        self._cursor = move.parent
+        return diff
+
+    def step_forward(self, move: Move):
+        """
+        Set the cursor to a child of the cursor. Only the points of its diff
+        are changed, the board is rebuilt if that is not possible.
+        """
+        if move.parent is not self.cursor or (diff := self._apply_diff(move)) is None:
+            self._set_cursor(move)
+            return
+        self._cursor_changed(changed=diff.points)
+
+    def step_back(self):
+        """Set the cursor to its parent, reverting the diff of the cursor"""
+        move = self.cursor
+        if not move.parent:
+            return
+        if (diff := self._revert_diff(move)) is None:
+            self._set_cursor(move.parent)
+            return
+        self._cursor_changed(changed=diff.points)
 
     def get_path(self):
         return self.cursor.get_path()
@@ -153,6 +388,8 @@ class Game:
             "play": self.play,
             "get_prisoners": lambda: self.prisoners,
             "set_cursor": self._set_cursor,
+            "step_forward": self.step_forward,
+            "step_back": self.step_back,
             "toggle_status": self.toggle_status,
             "count": self.count,
         }
@@ -172,27 +409,44 @@ class Game:
         else:
             result = self.test_move(move)
             try:
-                self.ruleset.validate(result)
+                self.apply_result(result)
             except RuleViolation as err:
                 logging.info("RuleViolation: %s", err)
                 result.exception = err
                 # result.next_player = color
             if not result.exception:
-                self._apply_result(result)
+                changed = result.move.diff.points if result.move.diff else None
+            else:
+                changed = set()
 
+            if self._batch:
+                self._batched = True
+                return result
+            if self._overlay:
+                self._overlay = False
+                changed = None
             self.fire_event(
                 CursorChanged(
                     next_player=self.nextcolor,
                     cursor=result.move,
                     board=self.board,
+                    changed=changed,
                 )
             )
         # for testing
         return result
 
+    def legal_moves(self, color: Optional[Status] = None) -> bytearray:
+        """
+        All legal points for `color` (default: next player) at once,
+        as a mask indexed by `x * boardsize + y`
+        """
+        return self.ruleset.legal_moves(color or self.nextcolor)
+
     def count(self, is_final=False):
-        groups = counted_groups(self.board)
-        result = self.ruleset.set_result(groups)
+        self.settle()
+        territory = self.territories.count(self.board)
+        result = self.ruleset.set_result(territory)
         if is_final:
             btotal = result.points[BLACK] + result.prisoners[BLACK]
             wtotal = result.points[WHITE] + result.prisoners[WHITE]
@@ -206,16 +460,35 @@ class Game:
             )
         else:
             event = Counted(
-                points=result.points, prisoners=result.prisoners, board=self.board
+                points=result.points,
+                prisoners=result.prisoners,
+                board=self.board,
+                territory=territory,
             )
+            self._overlay = True
         self.fire_event(event)
 
+    def settle(self):
+        """Mark the pass-alive stones alive and the stones in their territory dead"""
+        settled = self.territories.settle(self.board)
+        for point in settled.alive | settled.dead:
+            pos = divmod(point, self.boardsize)
+            status = self.board.pos(pos)
+            color = STONE_COLORS[status]
+            wanted = color.toggle_dead() if point in settled.dead else color
+            if status != wanted:
+                self._counted = True
+                self.board.pos(pos, wanted)
+
     def toggle_status(self, pos):
+        if pos[0] * self.boardsize + pos[1] in self.territories.settle(self.board):
+            logging.info("Settled, can not toggle %s", pos)
+            return
+        self._counted = True
         status = self.board.pos(pos).toggle_dead()
-        group = self.board.analyze(pos, findkilled=False)[1]
-        for x, y in group:
-            if not self.board[x][y].is_empty():
-                self.board[x][y] = status
+        if self.board.chain(pos):
+            for stone in self.board.analyze(pos, findkilled=False)[1]:
+                self.board.pos(stone, status)
         self.count()
 
     def undo(self):
@@ -12,6 +12,7 @@ from PyQt5.QtWidgets import QMainWindow, QMessageBox
 from pygoban import InputMode
 from pygoban.controller import ControllerMixin
 from pygoban.events import Event, Counted, CursorChanged, Ended, Reset
+from pygoban.move import MoveExtras
 from pygoban.player import Player
 from pygoban.status import BLACK, EMPTY, WHITE, Status, get_othercolor
 from pygoban.timesettings import TimeSettings
@@ -109,10 +110,11 @@ class GameWindow(QMainWindow, ControllerMixin, CenteredMixin):
     def inter_rightclicked(self, inter: Intersection):
         assert self.last_move_result
         cursor = self.last_move_result.cursor
-        cursor.extras.decorations.pop(inter.coord, None)
-        for color in (BLACK, WHITE):
-            cursor.extras.stones[color].discard(inter.coord)
-        cursor.extras.empty.discard(inter.coord)
+        if cursor.has_extras:
+            cursor.extras.decorations.pop(inter.coord, None)
+            for color in (BLACK, WHITE):
+                cursor.extras.stones[color].discard(inter.coord)
+            cursor.extras.empty.discard(inter.coord)
         self.game_callback("set_cursor", self.last_move_result.cursor)
 
     def inter_leftclicked(self, inter: Intersection):
@@ -127,6 +129,7 @@ class GameWindow(QMainWindow, ControllerMixin, CenteredMixin):
         elif self.input_mode == InputMode.DECO:
             if self._deco in (BLACK, WHITE):
                 self.last_move_result.cursor.extras.stones[self._deco].add(inter.coord)
+                self.game_callback("set_cursor", self.last_move_result.cursor)
             else:
                 self.last_move_result.cursor.extras.decorations[inter.coord] = self.deco
                 if self._deco == "NR":
@@ -185,10 +188,13 @@ class GameWindow(QMainWindow, ControllerMixin, CenteredMixin):
 
     @property
     def deco(self):
+        cursor = self.last_move_result.cursor
+        # the next number or letter, without creating extras for the cursor
+        extras = cursor.extras if cursor.has_extras else MoveExtras
         if self._deco == "NR":
-            return str(self.last_move_result.cursor.extras.nr)
+            return str(extras.nr)
         if self._deco == "CHAR":
-            return self.last_move_result.cursor.extras.char
+            return extras.char
         return self._deco
 
     @deco.setter
@@ -8,13 +8,12 @@ from PyQt5.QtWidgets import QWidget
 from PyQt5.QtCore import pyqtSignal
 
 from pygoban import events
+from pygoban.coords import letter_from_int
+from pygoban.status import BLACK, BLACK_LIB, EMPTY, WHITE_LIB
 from . import BASE_DIR, rotate
 from .intersection import Intersection
 
 
-COORDS = [chr(i) for i in list(range(97, 117))]
-
-
 def _hoshi_combis(singlecoords):
     return list(permutations((singlecoords), 2)) + [(i, i) for i in singlecoords]
 
@@ -27,7 +26,7 @@ HOSHIS = {
 
 
 class GuiBoard(QWidget):
-    boardupdate_signal = pyqtSignal(events.Event, list)
+    boardupdate_signal = pyqtSignal(events.Event, object)
 
     def __init__(self, parent, boardsize, *args, **kwargs):
         super().__init__(parent=parent, *args, **kwargs)
@@ -41,20 +40,29 @@ class GuiBoard(QWidget):
     def update_intersections(self, result, board):
         create = not self.intersections
         hoshis = HOSHIS.get(self.boardsize, [])
-        for x in self.boardrange:
-            for y in self.boardrange:
-                cx, cy = x, y  # rotate(x, y, self.boardsize)
-                pos = (cx, cy)
-                status = board[cx][cy]
-                if create:
-                    is_hoshi = (cx, cy) in hoshis
-                    inter = Intersection(self, pos, status, is_hoshi)
-                    inter.show()
-                    inter.setParent(self)
-                    self.intersections[pos] = inter
-                else:
-                    inter = self.intersections[pos]
-                    inter.status = status
+        if (
+            not create
+            and isinstance(result, events.CursorChanged)
+            and result.changed is not None
+        ):
+            positions = result.changed
+        else:
+            positions = [(x, y) for x in self.boardrange for y in self.boardrange]
+        territory = getattr(result, "territory", None)
+        for pos in positions:
+            cx, cy = pos  # rotate(x, y, self.boardsize)
+            status = board[cx][cy]
+            if territory and status == EMPTY and (owner := territory.owner(pos)):
+                status = BLACK_LIB if owner == BLACK else WHITE_LIB
+            if create:
+                is_hoshi = (cx, cy) in hoshis
+                inter = Intersection(self, pos, status, is_hoshi)
+                inter.show()
+                inter.setParent(self)
+                self.intersections[pos] = inter
+            else:
+                inter = self.intersections[pos]
+                inter.status = status
 
         if self.current_in:
             self.current_in.is_current = False
@@ -112,7 +120,7 @@ class GuiBoard(QWidget):
             painter.drawText(
                 QRect(x + borderspace, borderspace / 4, dist, dist),
                 Qt.AlignCenter,
-                COORDS[pos].upper(),
+                letter_from_int(pos),
             )
 
             painter.drawText(
@@ -104,17 +104,16 @@ class Intersection(QWidget):
             painter.setBrush(QColor("black"))
             painter.drawEllipse(hosp, hosp, hosz, hosz)
 
-        for status in (BLACK, WHITE):
-            if (
-                self.coord
-                in self.controller.last_move_result.cursor.extras.stones[status]
-            ):
-                self.status = status
+        cursor = self.controller.last_move_result.cursor
+        if cursor.has_extras:
+            for status in (BLACK, WHITE):
+                if self.coord in cursor.extras.stones[status]:
+                    self.status = status
 
         stone_img = self.stone_by_status.get(self.status)
         if (
             self.controller.last_move_result.next_player
-            and self.controller.last_move_result.cursor.color
+            and cursor.color
             and self._hover
             and not stone_img
         ):
@@ -134,12 +133,10 @@ class Intersection(QWidget):
                 pixmap,
             )
         if self.controller.input_mode != InputMode.COUNT:
-            deco = self.controller.last_move_result.cursor.extras.decorations.get(
-                self.coord
-            )
+            deco = cursor.has_extras and cursor.extras.decorations.get(self.coord)
             if deco:
                 self.draw_char(painter, deco)
-            child = self.controller.last_move_result.cursor.children.get(self.coord)
+            child = cursor.children.get(self.coord)
 
             if child:
                 stone_img = self.stone_by_status[
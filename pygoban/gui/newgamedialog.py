@@ -51,7 +51,7 @@ class NewGameDialog(QDialog):
         self.size_box.addItems(["9", "13", "19"])
         self.size_box.setCurrentIndex(2)
         self.ruleset_box = QComboBox()
-        self.ruleset_box.addItems(["Edit", "Japanese"])
+        self.ruleset_box.addItems(["Edit", "Japanese", "Chinese", "AGA"])
         self.ruleset_box.setCurrentIndex(1)
         self.komi_edit = QLineEdit("6.5")
         self.handicap_box = QComboBox()
@@ -108,6 +108,8 @@ class NewGameDialog(QDialog):
         ):
             args.append(f"--{arg}=" + box.currentText())
         args.append(f"--komi=" + self.komi_edit.text())
+        if (ruleset := self.ruleset_box.currentText()) != "Edit":
+            args.append("--ruleset=" + ruleset.lower())
         if self.time_check.isChecked():
             timestr = ":".join([edit.text() for edit in self.time_edits.values()])
             args.append(f"--time=" + timestr)
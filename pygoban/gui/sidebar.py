@@ -285,12 +285,10 @@ class EditBox(Box):
         self.controller.callbacks["set_cursor"](curr)
 
     def do_prev_move(self):
-        self.controller.callbacks["set_cursor"](
-            self.controller.last_move_result.cursor.parent
-        )
+        self.controller.callbacks["step_back"]()
 
     def do_next_move(self):
-        self.controller.callbacks["set_cursor"](
+        self.controller.callbacks["step_forward"](
             list(self.controller.last_move_result.cursor.children.values())[0]
         )
 
@@ -348,8 +346,8 @@ class Sidebar(QFrame):
 
     def save_as_file(self):
         name = filename_from_savedialog(self)
-        with open(name, "w") as fileobj:
-            fileobj.write(self.controller.to_sgf())
+        with open(name, "w", encoding="utf-8") as fileobj:
+            self.controller.to_sgf(fileobj)
 
     def new_open(self):
         parser = get_argparser()
@@ -379,5 +377,5 @@ class Sidebar(QFrame):
             if box.isVisible():
                 box.update_controlls(event)
         if isinstance(event, events.CursorChanged):
-            cmts = event.cursor.extras.comments or [""]
+            cmts = event.cursor.has_extras and event.cursor.extras.comments or [""]
             self.comments.setText("\n".join(cmts))
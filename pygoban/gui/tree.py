@@ -17,7 +17,7 @@ class MoveNode(QLabel):
         self.setStyleSheet(
             "QLabel { color: %s }" % ("white" if self.move.color == BLACK else "black")
         )
-        self.setText(str(len(move.get_path())))
+        self.setText(str(move.depth))
         self.setAlignment(Qt.AlignCenter)
         self.child_index = (
             list(move.parent.children.values()).index(move) if move.parent else None
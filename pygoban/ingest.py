@@ -0,0 +1,144 @@
+"""
+Load, validate and score many sgf files on all cores:
+
+    pygoban ingest DIR [--processes N] [--summary ingest.csv]
+
+Every file is read lazily, its main line is replayed with the rules checked
+and the final position is counted like in `simulation.score`. The summary
+has one row per file, in the order of the paths.
+"""
+
+import argparse
+import csv
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Type
+
+from .rulesets import BaseRuleset, RuleViolation
+from .rulesets.standard import get_ruleset_cls
+from .sgf.reader import read
+from .simulation import SimulationResult, score
+
+REPORT_EVERY = 1000
+"""Files between two progress lines"""
+
+
+@dataclass
+class IngestResult:
+    path: str
+    size: int = 0
+    """Bytes of the file"""
+    boardsize: int = 0
+    moves: int = 0
+    """Moves of the main line"""
+    result: str = ""
+    """The `RE` property"""
+    counted: str = ""
+    """The score of the final position, like B+3.5"""
+    violation: str = ""
+    """The first move against the rules"""
+    error: str = ""
+    """Why the file could not be read"""
+
+
+def ingest_file(path: str, ruleset_cls: Optional[Type[BaseRuleset]] = None):
+    result = IngestResult(path=path)
+    try:
+        result.size = Path(path).stat().st_size
+        game = read(path, {"SZ": 19}, ruleset_cls=ruleset_cls, lazy=True)
+        result.boardsize = game.boardsize
+        result.result = game.infos.get("RE", "")
+        with game.batch():
+            while game.cursor.children:
+                move = next(iter(game.cursor.children.values()))
+                move_result = game.test_move(move)
+                try:
+                    game.apply_result(move_result, validate=not result.violation)
+                except RuleViolation as err:
+                    # the first violation is kept, the main line is replayed
+                    result.violation = f"{result.moves + 1}: {err.__class__.__name__}"
+                    game.apply_result(move_result, validate=False)
+                result.moves += 1
+            counted = SimulationResult()
+            score(game, counted)
+        color = counted.color.shortval if counted.color else ""
+        result.counted = counted.msg.format(color=color)
+    except Exception as err:  # pylint: disable=broad-except
+        # a broken file is a row of the summary, the run goes on
+        result.error = f"{err.__class__.__name__}: {err}"
+    return result
+
+
+def ingest(
+    paths: Iterable[str],
+    processes: Optional[int] = None,
+    chunksize: int = 16,
+    ruleset_cls: Optional[Type[BaseRuleset]] = None,
+) -> Iterator[IngestResult]:
+    """
+    `ingest_file` for every path in a pool of `processes` (default: all cores),
+    sent to the workers in chunks of `chunksize` paths. The results are
+    yielded in the order of the paths while the pool is still working.
+    """
+    func = partial(ingest_file, ruleset_cls=ruleset_cls)
+    if processes == 1:
+        yield from map(func, paths)
+        return
+    with ProcessPoolExecutor(processes) as executor:
+        yield from executor.map(func, paths, chunksize=chunksize)
+
+
+def find_sgf_files(directory: str) -> List[str]:
+    return sorted(str(path) for path in Path(directory).rglob("*.sgf"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        "pygoban ingest", description=__doc__.splitlines()[1]
+    )
+    parser.add_argument("directory", help="Searched for *.sgf files recursively")
+    parser.add_argument("--processes", type=int, help="Default: all cores")
+    parser.add_argument("--chunksize", type=int, default=16)
+    parser.add_argument("--summary", help="CSV file, default: stdout")
+    parser.add_argument(
+        "--ruleset",
+        help="Default: the RU of the sgf file",
+        choices=("default", "japanese", "chinese", "aga"),
+    )
+    args = parser.parse_args(argv)
+    paths = find_sgf_files(args.directory)
+    results = ingest(
+        paths,
+        processes=args.processes,
+        chunksize=args.chunksize,
+        ruleset_cls=get_ruleset_cls(args.ruleset) if args.ruleset else None,
+    )
+    out = open(args.summary, "w", newline="") if args.summary else sys.stdout
+    errors = 0
+    start = time.perf_counter()
+    try:
+        writer = csv.DictWriter(out, [field.name for field in fields(IngestResult)])
+        writer.writeheader()
+        for index, result in enumerate(results, 1):
+            writer.writerow(asdict(result))
+            errors += bool(result.error)
+            if not index % REPORT_EVERY:
+                seconds = time.perf_counter() - start
+                print(
+                    f"{index}/{len(paths)}  {index / seconds:.0f} files/s",
+                    file=sys.stderr,
+                )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    seconds = time.perf_counter() - start
+    print(
+        f"{len(paths)} files  {len(paths) / seconds if seconds else 0:.0f} files/s"
+        f"  {errors} errors",
+        file=sys.stderr,
+    )
+    return 0
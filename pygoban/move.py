@@ -1,7 +1,8 @@
 from copy import copy
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Tuple, Union
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, Union
 from enum import Enum
+from .coords import intern_pos
 from .status import Status, BLACK, WHITE
 
 
@@ -19,6 +20,21 @@ class MoveExtras:
         return self.stones[BLACK] or self.stones[WHITE]
 
 
+class MoveDiff(NamedTuple):
+    """What applying a move changed, to step back and forth without a replay"""
+
+    changes: Tuple[Tuple[Tuple[int, int], Status, Status], ...]
+    """(pos, before, after) for the placed stone, captures and setup stones"""
+    prisoners: int
+    hash_before: int
+    ko_before: Optional[Tuple[int, int]]
+    ko_after: Optional[Tuple[int, int]]
+
+    @property
+    def points(self) -> Set[Tuple[int, int]]:
+        return {change[0] for change in self.changes}
+
+
 class Empty(Enum):
     ROOT = "first_move"
     PASS = "pass"
@@ -27,6 +43,18 @@ class Empty(Enum):
 
 
 class Move:
+    __slots__ = (
+        "pos",
+        "color",
+        "children",
+        "_parent",
+        "depth",
+        "_jump",
+        "hash",
+        "diff",
+        "_extras",
+    )
+
     def __init__(
         self,
         color: Status = None,
@@ -34,16 +62,44 @@ class Move:
         parent=None,
         **extras,
     ):
-        self.pos = pos
+        self.pos = intern_pos(pos) if isinstance(pos, tuple) else pos
         self.color = color
         self.children: Dict[str, Move] = {}
         self._parent = None
-        stones = extras.pop("stones", {})
-        self.extras = MoveExtras(**extras)
-        self.extras.stones.update(stones)
+        self.depth = 0
+        """Number of moves from the root, set when the parent is set"""
+        self._jump: Move = self
+        """Ancestor for O(log depth) lookups (skew binary jump pointers)"""
+        self.hash: Optional[int] = None
+        """Zobrist hash of the position after this move (set when played)"""
+        self.diff: Optional[MoveDiff] = None
+        """Changes of the board when the move was played (None after counting)"""
+        self._extras: Optional[MoveExtras] = None
+        if extras:
+            stones = extras.pop("stones", {})
+            self._extras = MoveExtras(**extras)
+            self._extras.stones.update(stones)
         if parent:
             self.parent = parent
 
+    @property
+    def extras(self) -> MoveExtras:
+        """
+        Comments, markup and setup stones, created on first access. Check
+        `has_extras` before reading them, so that a node without extras keeps none.
+        """
+        if self._extras is None:
+            self._extras = MoveExtras()
+        return self._extras
+
+    @extras.setter
+    def extras(self, extras: Optional[MoveExtras]):
+        self._extras = extras
+
+    @property
+    def has_extras(self) -> bool:
+        return self._extras is not None
+
     @property
     def parent(self):
         return self._parent
@@ -52,6 +108,32 @@ class Move:
     def parent(self, _parent):
         self._parent = _parent
         self._parent.children.setdefault(self.pos, self)
+        self.depth = _parent.depth + 1
+        jump = _parent._jump
+        if _parent.depth - jump.depth == jump.depth - jump._jump.depth:
+            self._jump = jump._jump
+        else:
+            self._jump = _parent
+
+    def ancestor(self, depth: int) -> "Move":
+        """The ancestor at `depth` (or the move itself)"""
+        move = self
+        while move.depth > depth:
+            move = move._jump if move._jump.depth >= depth else move._parent
+        return move
+
+    def common_ancestor(self, other: "Move") -> Optional["Move"]:
+        """The deepest move on the paths of both, None for different trees"""
+        first = self.ancestor(other.depth)
+        second = other.ancestor(self.depth)
+        while first is not second:
+            if not first.depth:
+                return None
+            if first._jump is not second._jump:
+                first, second = first._jump, second._jump
+            else:
+                first, second = first._parent, second._parent
+        return first
 
     @property
     def is_empty(self):
@@ -66,14 +148,12 @@ class Move:
         return self.pos == Empty.ROOT
 
     def get_path(self):
-        path = []
+        path = [self] * self.depth
         curr = self
-        while curr:
-            path.append(curr)
-            assert curr != curr.parent
+        for index in range(self.depth - 1, -1, -1):
+            path[index] = curr
             curr = curr.parent
-        path.reverse()
-        return path[1:]
+        return path
 
     # def __del__(self):
     #     if self.parent:
@@ -82,7 +162,7 @@ class Move:
 
     def __str__(self):
         return f"({str(id(self))}) " + ", ".join(
-            (str(self.pos) or "-", str(self.color), str(self.extras))
+            (str(self.pos) or "-", str(self.color), str(self._extras))
         )
 
     def __repr__(self):
@@ -91,13 +171,16 @@ class Move:
     def __copy__(self):
         """start with root!"""
         move = self.__class__(color=self.color, pos=copy(self.pos))
-        move.extras = copy(self.extras)
-        move.children = {}
-        for child in self.children.values():
-            if not child.children and child.is_pass:
-                continue
-            move.children[child.pos] = copy(child)
-            move.children[child.pos].parent = move
-        if move.is_root:
-            move._parent = None
+        move.extras = copy(self._extras)
+        stack = [(self, move)]
+        while stack:
+            orig, parent = stack.pop()
+            for child in orig.children.values():
+                if not child.children and child.is_pass:
+                    continue
+                child_copy = self.__class__(
+                    color=child.color, pos=copy(child.pos), parent=parent
+                )
+                child_copy.extras = copy(child._extras)
+                stack.append((child, child_copy))
         return move
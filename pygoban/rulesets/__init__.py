@@ -1,13 +1,8 @@
-from pygoban.status import (
-    EMPTY,
-    BLACK,
-    WHITE,
-    WHITE_LIB,
-    BLACK_LIB,
-    DEAD_BLACK,
-    DEAD_WHITE,
-)
+from typing import Dict, Optional
+
+from pygoban.status import EMPTY, BLACK, WHITE, Status
 from pygoban import GameResult, move
+from pygoban.counting import Territory
 
 
 class RuleViolation(Exception):
@@ -18,6 +13,10 @@ class KoViolation(RuleViolation):
     pass
 
 
+class SuperkoViolation(KoViolation):
+    pass
+
+
 class OccupiedViolation(RuleViolation):
     pass
 
@@ -28,6 +27,8 @@ class NoLibsViolation(RuleViolation):
 
 class BaseRuleset:
     name = "Basic Rules"
+    area_scoring = False
+    """Count stones and territory instead of territory and prisoners"""
 
     def __init__(self, game):
         self.ko = None
@@ -51,33 +52,67 @@ class BaseRuleset:
 
         if (x, y) == self.ko:
             raise KoViolation(f"Invalid Ko: {result}")
+        self.validate_position(result)
+
+    def update_ko(self, result):
+        """Called by the game for every applied move, also while replaying"""
         if len(result.libs) == 1 and result.libs == result.killed:
             self.ko = list(result.killed)[0]
         else:
             self.ko = None
 
-    def set_result(self, groups=None):
-        blibs = 0
-        wlibs = float(self.game.infos["KM"])
-        wdead = self.game.prisoners[BLACK]
-        bdead = self.game.prisoners[WHITE]
-        if groups:
-            board = self.game.board
-            boardrange = range(board.boardsize)
-            for x in boardrange:
-                for y in boardrange:
-                    status = board[x][y]
-                    if status == BLACK_LIB:
-                        blibs += 1
-                    elif status == DEAD_WHITE:
-                        blibs += 1
-                        wdead += 1
-                    elif status == WHITE_LIB:
-                        wlibs += 1
-                    elif status == DEAD_BLACK:
-                        bdead += 1
-                        wlibs += 1
-
-        return GameResult(
-            points={BLACK: blibs, WHITE: wlibs}, prisoners={BLACK: wdead, WHITE: bdead}
+    def legal_moves(self, color) -> bytearray:
+        """Mask of legal points for `color` (see `BaseBoard.legal_mask`)"""
+        mask = self.game.board.legal_mask(color)
+        if self.ko:
+            x, y = self.ko
+            mask[x * self.game.boardsize + y] = 0
+        return mask
+
+    def validate_position(self, result):
+        """Hook for rules about the resulting position (superko)"""
+
+    def cursor_changed(self, cursor):
+        """Called by the game whenever the cursor was set or a move was played"""
+
+    def hash_changed(self, move):
+        """Called by the game when the position of a played move changed (setup)"""
+
+    @classmethod
+    def compensation(cls, handicap: int) -> int:
+        """Points for white in a handicap game"""
+        return 0
+
+    @classmethod
+    def score(
+        cls,
+        territory: Optional[Territory],
+        prisoners: Dict[Status, int],
+        komi: float = 0.0,
+        handicap: int = 0,
+    ) -> GameResult:
+        """
+        The result under these rules from the ownership of a counted position,
+        so one `Territory` can be scored under several rulesets.
+        """
+        points = {BLACK: 0, WHITE: komi + cls.compensation(handicap)}
+        if cls.area_scoring:
+            prisoners = {BLACK: 0, WHITE: 0}
+        else:
+            prisoners = dict(prisoners)
+        if territory:
+            for color in (BLACK, WHITE):
+                points[color] += territory.points[color]
+                if cls.area_scoring:
+                    points[color] += territory.stones[color]
+                else:
+                    prisoners[color] += territory.prisoners[color]
+        return GameResult(points=points, prisoners=prisoners)
+
+    def set_result(self, territory: Optional[Territory] = None):
+        return self.score(
+            territory,
+            self.game.prisoners,
+            komi=float(self.game.infos.get("KM", 0)),
+            handicap=int(self.game.infos.get("HA", 0)),
         )
@@ -0,0 +1,75 @@
+"""
+The common rulesets, by their name in the sgf `RU` property. They differ in
+the ko rule and the scoring, which all derive from one `Territory`.
+"""
+
+from typing import Dict, Iterable, Optional, Type
+
+from pygoban import GameResult, logging
+from pygoban.counting import Territory
+from pygoban.status import Status
+from . import BaseRuleset
+from .superko import PositionalSuperkoRuleset, SituationalSuperkoRuleset
+
+
+class JapaneseRuleset(BaseRuleset):
+    """Territory and prisoners, basic ko"""
+
+    name = "Japanese"
+
+
+class ChineseRuleset(PositionalSuperkoRuleset):
+    """Area, positional superko. White gets a point per handicap stone"""
+
+    name = "Chinese"
+    area_scoring = True
+
+    @classmethod
+    def compensation(cls, handicap):
+        return handicap if handicap > 1 else 0
+
+
+class AGARuleset(SituationalSuperkoRuleset):
+    """
+    Area (that equals territory with pass stones), situational superko.
+    White gets a point per handicap stone after the first.
+    """
+
+    name = "AGA"
+    area_scoring = True
+
+    @classmethod
+    def compensation(cls, handicap):
+        return handicap - 1 if handicap > 1 else 0
+
+
+RULESETS: Dict[str, Type[BaseRuleset]] = {
+    "default": BaseRuleset,
+    "japanese": JapaneseRuleset,
+    "chinese": ChineseRuleset,
+    "aga": AGARuleset,
+}
+"""Rulesets by the lowercased `RU` value"""
+
+
+def get_ruleset_cls(name: Optional[str]) -> Type[BaseRuleset]:
+    if not name:
+        return BaseRuleset
+    if (ruleset_cls := RULESETS.get(name.strip().lower())) is None:
+        logging.warning("Unknown ruleset %s, using %s", name, BaseRuleset.name)
+        return BaseRuleset
+    return ruleset_cls
+
+
+def score_all(
+    territory: Territory,
+    prisoners: Dict[Status, int],
+    komi: float = 0.0,
+    handicap: int = 0,
+    rulesets: Optional[Iterable[Type[BaseRuleset]]] = None,
+) -> Dict[str, GameResult]:
+    """The result of one counted position under several rulesets"""
+    return {
+        ruleset_cls.name: ruleset_cls.score(territory, prisoners, komi, handicap)
+        for ruleset_cls in rulesets or RULESETS.values()
+    }
@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from pygoban.move import Move
+from pygoban.status import BLACK, WHITE
+from . import BaseRuleset, SuperkoViolation
+
+
+class SuperkoRuleset(BaseRuleset):
+    """
+    Forbids moves that repeat an earlier position of the current path.
+
+    The keys of all positions from the root to the cursor are kept in a multiset.
+    When the cursor changes, only the nodes below the last common node of the old
+    and the new path are removed and added, so a check is O(1) per move.
+    """
+
+    name = "Superko"
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.path: List[Tuple[Move, int]] = []
+        """Nodes from the root to the cursor with their keys"""
+        self.index: Dict[Move, int] = {}
+        self.seen: Counter = Counter()
+
+    def key(self, position_hash, color) -> int:
+        raise NotImplementedError()
+
+    def cursor_changed(self, cursor):
+        branch = []
+        node = cursor
+        while node is not None and node not in self.index:
+            branch.append(node)
+            node = node.parent
+        self._truncate(0 if node is None else self.index[node] + 1)
+        for node in reversed(branch):
+            key = self.key(node.hash, node.color)
+            self.index[node] = len(self.path)
+            self.path.append((node, key))
+            self.seen[key] += 1
+
+    def hash_changed(self, move):
+        # the key of the move is stale, it is added again with the next cursor
+        if move in self.index:
+            self._truncate(self.index[move])
+
+    def _truncate(self, keep: int):
+        """Remove the nodes from `keep` on"""
+        for old, key in self.path[keep:]:
+            del self.index[old]
+            self.seen[key] -= 1
+            if not self.seen[key]:
+                del self.seen[key]
+        del self.path[keep:]
+
+    def legal_moves(self, color):
+        mask = super().legal_moves(color)
+        board = self.game.board
+        for index, legal in enumerate(mask):
+            if legal:
+                position_hash = board.hash_after(divmod(index, board.boardsize), color)
+                if self.key(position_hash, color) in self.seen:
+                    mask[index] = 0
+        return mask
+
+    def validate_position(self, result):
+        if self.key(result.hash, result.move.color) in self.seen:
+            raise SuperkoViolation(f"Position repeated: {result}")
+
+
+class PositionalSuperkoRuleset(SuperkoRuleset):
+    """No position may repeat, whoever is to move"""
+
+    name = "Positional Superko"
+
+    def key(self, position_hash, color):
+        return position_hash
+
+
+_rand = random.Random("pygoban-situational")
+SIDE_KEYS = {None: 0, BLACK: _rand.getrandbits(64), WHITE: _rand.getrandbits(64)}
+"""Mixed into the position hash to tell who played last"""
+
+
+class SituationalSuperkoRuleset(SuperkoRuleset):
+    """No position may repeat with the same player to move"""
+
+    name = "Situational Superko"
+
+    def key(self, position_hash, color):
+        return position_hash ^ SIDE_KEYS[color]
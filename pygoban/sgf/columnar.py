@@ -0,0 +1,244 @@
+"""
+The main lines of many games as flat arrays, read from sgf bytes without
+creating moves or games:
+
+- points: `x * boardsize + y` of every move, `PASS` for a pass
+- colors: `Status.intval` of the player of every move
+- offsets: the index of the first move of every game, and the end
+- boardsizes: one per game
+- infos: the root properties of every game
+
+The arrays are saved as .npy files, that `numpy.load(path, mmap_mode="r")`
+maps. `load_npy` maps them without numpy.
+"""
+
+import ast
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pygoban import logging
+from pygoban.coords import SGF_INDEXES
+from pygoban.status import BLACK, WHITE
+
+from . import INFO_KEYS
+from .lexer import (
+    CLOSE,
+    DEFAULT_CHARSET,
+    NODE,
+    OPEN,
+    SGFError,
+    encoding,
+    raw_tokens,
+    transcode,
+)
+
+PASS = -1
+
+COLORS = {"B": BLACK.intval, "W": WHITE.intval}
+
+INDEXES = {ord(char): index for char, index in SGF_INDEXES.items()}
+
+NPY_MAGIC = b"\x93NUMPY"
+
+_ORDER = "<" if sys.byteorder == "little" else ">"
+NPY_DESCR = {"b": "|i1", "h": f"{_ORDER}i2", "q": f"{_ORDER}i8"}
+"""numpy dtype of the array typecodes"""
+
+COLUMNS = ("points", "colors", "offsets", "boardsizes")
+
+Column = Union[array, memoryview]
+
+
+class MainLines:
+    """
+    Columns of the main lines of games. Loaded columns are read only views
+    of memory mapped files.
+    """
+
+    def __init__(self):
+        self.points: Column = array("h")
+        self.colors: Column = array("b")
+        self.offsets: Column = array("q", [0])
+        self.boardsizes: Column = array("h")
+        self.infos: List[Dict] = []
+
+    def __len__(self):
+        return len(self.boardsizes)
+
+    def game(self, index: int) -> Tuple[Column, Column]:
+        """The points and colors of a game"""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.points[start:end], self.colors[start:end]
+
+    def add(self, data, start: int = 0) -> int:
+        """
+        Add the main lines of the game trees in sgf bytes (like a memory mapped
+        file). Returns the number of games. If the bytes are broken or end in a
+        game tree, `SGFError` is raised and no game of them is added.
+        """
+        length = len(self)
+        try:
+            return self._add(data, start)
+        except SGFError:
+            self.truncate(length)
+            raise
+        except (LookupError, ValueError) as err:
+            self.truncate(length)
+            raise SGFError(f"Invalid value: {err!r}") from err
+
+    def _add(self, data, start: int) -> int:
+        games = depth = nodes = 0
+        boardsize = 19
+        main = True
+        raw_infos: Dict[str, List[bytes]] = {}
+        data, start, codec = transcode(data, start)
+        for token in raw_tokens(data, start):
+            if token == OPEN:
+                depth += 1
+                if depth == 1:
+                    boardsize = 19
+                    nodes = 0
+                    main = True
+                    raw_infos = {}
+            elif token == CLOSE:
+                depth -= 1
+                # the main line ends with its first variation
+                main = False
+                if not depth:
+                    self.offsets.append(len(self.points))
+                    self.boardsizes.append(boardsize)
+                    self.infos.append(decode_infos(raw_infos, codec))
+                    games += 1
+            elif token == NODE:
+                nodes += 1
+            elif main:
+                ident, values = token
+                if color := COLORS.get(ident):
+                    self.points.append(encode_point(values[0], boardsize))
+                    self.colors.append(color)
+                elif nodes == 1 and (ident in INFO_KEYS or ident in ("AB", "AW")):
+                    raw_infos[ident] = values
+                    if ident == "SZ":
+                        boardsize = int(values[0].split(b":")[0])
+        if depth:
+            raise SGFError("Unclosed game tree")
+        return games
+
+    def truncate(self, length: int):
+        """Keep the first `length` games"""
+        end = self.offsets[length]
+        del self.points[end:]
+        del self.colors[end:]
+        del self.offsets[length + 1 :]
+        del self.boardsizes[length:]
+        del self.infos[length:]
+
+    def save(self, path: str):
+        """The columns as `path`.<column>.npy, the infos as `path`.infos.jsonl"""
+        for column in COLUMNS:
+            write_npy(f"{path}.{column}.npy", getattr(self, column))
+        with open(f"{path}.infos.jsonl", "w", encoding="utf-8") as fileobj:
+            for infos in self.infos:
+                fileobj.write(json.dumps(infos, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "MainLines":
+        lines = cls()
+        for column in COLUMNS:
+            setattr(lines, column, load_npy(f"{path}.{column}.npy"))
+        with open(f"{path}.infos.jsonl", encoding="utf-8") as fileobj:
+            lines.infos = [json.loads(line) for line in fileobj]
+        return lines
+
+
+def encode_point(value: bytes, boardsize: int) -> int:
+    if not value or value == b"tt" and boardsize <= 19:
+        return PASS
+    return INDEXES[value[1]] * boardsize + INDEXES[value[0]]
+
+
+def decode_infos(
+    raw_infos: Dict[str, List[bytes]], codec: Optional[str] = None
+) -> Dict:
+    """
+    Root properties as text, with `codec` or the `CA` charset. AB and AW keep
+    all values
+    """
+    if not codec:
+        codec = encoding(raw_infos["CA"][0]) if "CA" in raw_infos else DEFAULT_CHARSET
+    infos: Dict = {}
+    for ident, values in raw_infos.items():
+        decoded = [value.decode(codec, "replace") for value in values]
+        infos[ident] = decoded if ident in ("AB", "AW") else decoded[0]
+    return infos
+
+
+def write_shards(
+    paths: Iterable[str], directory: str, games_per_shard: int = 100000
+) -> List[str]:
+    """
+    Save the main lines of the games in the sgf files (collections or single
+    games) in shards of about `games_per_shard` games. Returns the shard paths.
+    Broken files are skipped with a warning.
+    """
+    shards = []
+    lines = MainLines()
+
+    def save():
+        shards.append(os.path.join(directory, f"shard-{len(shards):05}"))
+        lines.save(shards[-1])
+
+    for path in paths:
+        with open(path, "rb") as fileobj:
+            if not os.fstat(fileobj.fileno()).st_size:
+                continue
+            with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                try:
+                    lines.add(data)
+                except SGFError as err:
+                    logging.warning("Skipping %s: %s", path, err)
+        if len(lines) >= games_per_shard:
+            save()
+            lines = MainLines()
+    if len(lines) or not shards:
+        save()
+    return shards
+
+
+def write_npy(path: str, values: array):
+    """A 1-d array as .npy file (format version 1.0)"""
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (
+        NPY_DESCR[values.typecode],
+        len(values),
+    )
+    # the data starts at a multiple of 64 bytes, the header ends with a newline
+    size = len(NPY_MAGIC) + 4 + len(header) + 1
+    header += " " * (-size % 64) + "\n"
+    with open(path, "wb") as fileobj:
+        fileobj.write(NPY_MAGIC + bytes((1, 0)) + struct.pack("<H", len(header)))
+        fileobj.write(header.encode("latin1"))
+        values.tofile(fileobj)
+
+
+def load_npy(path: str) -> memoryview:
+    """A 1-d .npy file of `write_npy` as read only view of its memory map"""
+    with open(path, "rb") as fileobj:
+        data = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:6] != NPY_MAGIC:
+        raise ValueError(f"No npy file: {path}")
+    if data[6] == 1:
+        (length,) = struct.unpack("<H", data[8:10])
+        start = 10
+    else:
+        (length,) = struct.unpack("<I", data[8:12])
+        start = 12
+    header = ast.literal_eval(data[start : start + length].decode("latin1"))
+    typecodes = {descr: typecode for typecode, descr in NPY_DESCR.items()}
+    if header["descr"] not in typecodes or len(header["shape"]) != 1:
+        raise ValueError(f"Not supported: {header}")
+    return memoryview(data)[start + length :].cast(typecodes[header["descr"]])
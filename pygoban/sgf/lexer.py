@@ -0,0 +1,255 @@
+"""
+Tokens of sgf bytes in one pass over them, without regular expressions or
+slicing off the rest of the bytes. Raw bytes (e.g. a memory mapped file) are
+read in place and only the values are decoded. Text, and the bytes of a
+charset with ASCII bytes inside of its characters, are encoded as UTF-8 first.
+"""
+
+import codecs
+import string
+from typing import Any, Iterator, List, Optional, TextIO, Tuple, Union
+
+from pygoban import logging
+
+OPEN = "("
+CLOSE = ")"
+NODE = ";"
+
+Token = Union[str, Tuple[str, List[str]]]
+"""OPEN, CLOSE, NODE or a property as (ident, values)"""
+
+RawToken = Union[str, Tuple[str, List[bytes]]]
+"""Like `Token`, with the undecoded values"""
+
+STRUCTURE = {ord(char): char for char in (OPEN, CLOSE, NODE)}
+BRACKET = ord("[")
+LETTERS = frozenset(string.ascii_letters.encode())
+UPPERCASE = frozenset(string.ascii_uppercase.encode())
+WHITESPACE = frozenset(string.whitespace.encode())
+
+DEFAULT_CHARSET = "iso8859-1"
+"""The charset of a sgf without `CA`"""
+
+TEXT_CHARSETS = frozenset(
+    (
+        "big5",
+        "big5hkscs",
+        "cp932",
+        "cp950",
+        "gb18030",
+        "gbk",
+        "hz",
+        "iso2022_jp",
+        "iso2022_jp_1",
+        "iso2022_jp_2",
+        "iso2022_jp_2004",
+        "iso2022_jp_3",
+        "iso2022_jp_ext",
+        "iso2022_kr",
+        "johab",
+        "shift_jis",
+        "shift_jis_2004",
+        "shift_jisx0213",
+        "utf-7",
+    )
+)
+"""
+Charsets with bytes like "\\", "]" or "(" inside of their characters. Their
+bytes are converted to UTF-8 before they are split into tokens.
+"""
+
+
+class SGFError(ValueError):
+    pass
+
+
+def raw_value(data, start: int) -> Tuple[bytes, int]:
+    """
+    The unescaped value that starts after the "[" at `start - 1` and the index
+    after its "]". Escaped line breaks are removed (soft line breaks). Only the
+    value is copied.
+    """
+    close = data.find(b"]", start)
+    if close == -1:
+        raise SGFError(f"Unclosed value at {start}")
+    if data.find(b"\\", start, close) == -1:
+        return data[start:close], close + 1
+    parts = []
+    index = start
+    while True:
+        slash = data.find(b"\\", index, close)
+        if slash == -1:
+            parts.append(data[index:close])
+            return b"".join(parts), close + 1
+        parts.append(data[index:slash])
+        escaped = data[slash + 1 : slash + 2]
+        index = slash + 2
+        if escaped == b"\r" and data[index : index + 1] == b"\n":
+            index += 1
+        elif escaped not in (b"\n", b"\r"):
+            parts.append(escaped)
+        if index > close:
+            close = data.find(b"]", index)
+            if close == -1:
+                raise SGFError(f"Unclosed value at {start}")
+
+
+def raw_tokens(data, start: int = 0) -> Iterator[RawToken]:
+    """
+    The tokens of sgf bytes from `start` on, like a memory mapped file, with
+    undecoded values. The structure is read in place, only idents and values
+    are copied.
+    """
+    return _tokens(data, start, None)
+
+
+def _tokens(data, start: int, codec: Optional[str]) -> Iterator:
+    """`raw_tokens`, the values are decoded if there is a `codec`"""
+    length = len(data)
+    index = start
+    while index < length:
+        byte = data[index]
+        if byte in STRUCTURE:
+            yield STRUCTURE[byte]
+            index += 1
+        elif byte in LETTERS:
+            end = index + 1
+            while end < length and data[end] in LETTERS:
+                end += 1
+            ident = data[index:end]
+            if not ident.isupper():
+                # FF[3] allows lowercase letters in idents, like "AddBlack"
+                ident = bytes(letter for letter in ident if letter in UPPERCASE)
+            values = []
+            while True:
+                while end < length and data[end] in WHITESPACE:
+                    end += 1
+                if end == length or data[end] != BRACKET:
+                    break
+                val, end = raw_value(data, end + 1)
+                values.append(val.decode(codec, "replace") if codec else val)
+            if not values:
+                raise SGFError(f"Property {ident.decode()} without values at {index}")
+            yield ident.decode(), values
+            index = end
+        elif byte in WHITESPACE:
+            index += 1
+        else:
+            raise SGFError(f"Unexpected {chr(byte)!r} at {index}")
+
+
+def charset(data, start: int = 0) -> str:
+    """The encoding of the `CA` property of the root node, ISO-8859-1 by default"""
+    nodes = 0
+    for token in raw_tokens(data, start):
+        if token == NODE:
+            nodes += 1
+            if nodes > 1:
+                break
+        elif token in (OPEN, CLOSE):
+            if nodes:
+                break
+        elif token[0] == "CA":
+            return encoding(token[1][0])
+    return DEFAULT_CHARSET
+
+
+def encoding(value: bytes) -> str:
+    """The codec of a `CA` value, ISO-8859-1 if it is unknown"""
+    name = value.decode("ascii", "replace").strip()
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        logging.warning("Unknown charset %s, using %s", name, DEFAULT_CHARSET)
+        return DEFAULT_CHARSET
+
+
+def transcode(data, start: int = 0) -> Tuple[Any, int, Optional[str]]:
+    """
+    The bytes that `raw_tokens` can split and where they start. The bytes of
+    `TEXT_CHARSETS` are converted to UTF-8 as a whole, the returned charset is
+    "utf-8" then. Otherwise the bytes are not copied and the charset is None.
+    """
+    codec = charset(data, start)
+    if codec not in TEXT_CHARSETS:
+        return data, start, None
+    text = bytes(data[start:]).decode(codec, "replace")
+    return text.encode("utf-8"), 0, "utf-8"
+
+
+def tokens(text: str, start: int = 0) -> Iterator[Token]:
+    """The tokens of `text` from `start` on"""
+    return _tokens(text[start:].encode("utf-8", "replace"), 0, "utf-8")
+
+
+def byte_tokens(data, start: int = 0) -> Iterator[Token]:
+    """`tokens` of sgf bytes. Only the values are decoded, with the `charset`"""
+    data, start, codec = transcode(data, start)
+    return _tokens(data, start, codec or charset(data, start))
+
+
+def game_trees(fileobj: TextIO, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """
+    The text of every game tree of a collection, read in chunks of
+    `chunk_size`. Only the current tree is kept in memory, text between the
+    trees is skipped.
+    """
+    parts: List[str] = []
+    depth = 0
+    in_value = escaped = False
+    while chunk := fileobj.read(chunk_size):
+        length = len(chunk)
+        # start of the current tree in the chunk, -1 for none
+        start = 0 if depth else -1
+        index = 0
+        while index < length:
+            if in_value:
+                if escaped:
+                    escaped = False
+                    index += 1
+                    continue
+                close = chunk.find("]", index)
+                end = length if close == -1 else close
+                slash = chunk.find("\\", index, end)
+                if slash != -1:
+                    escaped = True
+                    index = slash + 1
+                elif close == -1:
+                    index = length
+                else:
+                    in_value = False
+                    index = close + 1
+                continue
+            if not depth:
+                index = chunk.find("(", index)
+                if index == -1:
+                    break
+                start = index
+                depth = 1
+                index += 1
+                continue
+            # up to the next value: count the parentheses, stop at the end of the tree
+            bracket = chunk.find("[", index)
+            end = length if bracket == -1 else bracket
+            while (close := chunk.find(")", index, end)) != -1:
+                depth += chunk.count("(", index, close) - 1
+                index = close + 1
+                if not depth:
+                    break
+            if not depth:
+                parts.append(chunk[start:index])
+                yield "".join(parts)
+                parts = []
+                start = -1
+                continue
+            depth += chunk.count("(", index, end)
+            index = end
+            if bracket != -1:
+                close = chunk.find("]", bracket + 1)
+                if close != -1 and chunk.find("\\", bracket + 1, close) == -1:
+                    index = close + 1
+                else:
+                    in_value = True
+                    index += 1
+        if start != -1:
+            parts.append(chunk[start:])
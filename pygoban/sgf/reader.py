@@ -1,123 +1,89 @@
-from typing import Dict, List, Optional
-import re
+import mmap
+import os
+from contextlib import ExitStack
+from typing import Dict, Iterator, List, Optional, TextIO, Type, Union
 from pygoban.status import BLACK, WHITE
 from pygoban.move import Move, Empty
+from pygoban.board import BaseBoard, Board
 from pygoban.game import Game
+from pygoban.rulesets import BaseRuleset
 from pygoban.coords import sgf_to_pos
 from pygoban import logging
 
 from . import INFO_KEYS, INT_KEYS, TR, MA, CR, SQ
-
-SGF_CMD_PATTERN = r"([A-Za-z]{1,9})((?:\[.*?(?<!\\)\][\n]?)+).*"
-
-
-def nonescaped_square_bracket_index(txt, from_index=0):
-    while index := txt.index("]", from_index):
-        if index > 0 and txt[index - 1] == "\\":
-            from_index = index + 1
-            continue
-        return index
-
-
-def split(txt):
-    """
-    Iterator that split sgf into parts seperated by valid semicolons
-    """
-    searchindex = None
-    while True:
-        try:
-            sim = txt.index(";", searchindex or 0)
-        except ValueError:
-            yield txt
-            break
-        tmp = txt[(searchindex or 0) : sim]
-
-        while True:
-            try:
-                tmp.index("[")
-            except ValueError:
-                if searchindex is None:
-                    break
-                searchindex = None
-            try:
-                bclose = nonescaped_square_bracket_index(tmp)
-                tmp = tmp[bclose + 1 :]
-            except ValueError:
-                searchindex = sim + 1
-                break
-
-        if searchindex is not None:
-            continue
-
-        searchindex = None
-        yield txt[:sim]
-        txt = txt[sim + 1 :]
-
-
-class Enough(Exception):
-    pass
+from .lexer import CLOSE, NODE, OPEN, byte_tokens, game_trees, tokens
 
 
 class Parser:
-    def __init__(self, sgftxt: str, defaults: Dict):
+    def __init__(
+        self,
+        sgftxt: Union[str, bytes, mmap.mmap],
+        defaults: Dict,
+        board_cls: Type[BaseBoard] = Board,
+        ruleset_cls: Optional[Type[BaseRuleset]] = None,
+        lazy: bool = False,
+    ):
         self.sgftxt = sgftxt
+        """Text or raw bytes, decoded by the `CA` property"""
         self.defaults = defaults
-        self.pattern = re.compile(SGF_CMD_PATTERN, re.DOTALL)
+        self.board_cls = board_cls
+        self.ruleset_cls = ruleset_cls
+        """Default: by the `RU` property"""
+        self.lazy = lazy
+        """Only build the move tree, the moves are played when visited"""
         self.variations: List[Move] = []
         self.infos = {**defaults}
         self.game: Optional[Game] = None
-        self.lv = 0
-
-    def parse_part(self, part):
-        cnt = 0
-        while part := part.strip():
-            cnt += 1
-            if cnt == 1000:
-                print("p", len(part))
-                cnt = 0
-
-            # self.lv += 1
-            # if self.lv == 5000:
-            #   raise Enough()
-            match = self.pattern.match(part)
-            if match:
-                key, val = match.groups()
-                val = val.strip()[1:-1]
-                if key in INFO_KEYS:
-                    if key in INT_KEYS:
-                        val = int(val)
-                    self.infos[key] = val
-                else:
-                    self.game = self.game or Game(**self.infos)
-                    self[f"do_{key.lower()}"](val)
+        self.node: Optional[Move] = None
+        """The move the properties belong to"""
+        self.batch = ExitStack()
+        """Holds the batch of the game while parsing"""
+
+    def get_game(self) -> Game:
+        """The game, created when the first node after the root infos starts"""
+        if not self.game:
+            self.game = Game(
+                board_cls=self.board_cls, ruleset_cls=self.ruleset_cls, **self.infos
+            )
+            self.batch.enter_context(self.game.batch())
+            self.node = self.game.root
+        return self.game
 
-                part = part[match.span(2)[1] :]
+    def parse(self):
+        """Read the first game tree of the text"""
+        depth = 0
+        with self.batch:
+            if isinstance(self.sgftxt, str):
+                source = tokens(self.sgftxt)
             else:
-                char = part[0]
-                if char == ";":
-                    part = part[1:]
-                elif char == "(":
-                    self.variations.append(self.game.cursor)
-                    part = part[1:]
-                elif char == ")":
-                    self.game._set_cursor(self.variations.pop())
-                    part = part[1:]
+                source = byte_tokens(self.sgftxt)
+            for token in source:
+                if token == NODE:
+                    continue
+                if token == OPEN:
+                    if depth:
+                        self.get_game()
+                        self.variations.append(self.node)
+                    depth += 1
+                elif token == CLOSE:
+                    depth -= 1
+                    if not depth:
+                        break
+                    self.node = self.variations.pop()
+                    if not self.lazy:
+                        self.game._set_cursor(self.node)
                 else:
-                    raise Exception(f"Can not parse: ---\n{part}\n---")
-
-    def parse(self):
-        sgftxt = self.sgftxt.strip()[1:-1]
-        # cnt = 0
-        for part in split(sgftxt):
-            try:
-                self.parse_part(part)
-            except Enough:
-                break
-        #     cnt += 1
-        #     if cnt % 1000 == 0:
-        #         print("c", cnt)
-        # print("--")
-        # print("C", cnt)
+                    self.handle(*token)
+            game = self.get_game()
+            if self.lazy:
+                game._set_cursor(game.root)
+
+    def handle(self, ident: str, values: List[str]):
+        if ident in INFO_KEYS:
+            self.infos[ident] = int(values[0]) if ident in INT_KEYS else values[0]
+        else:
+            self.get_game()
+            self[f"do_{ident.lower()}"](values)
 
     def notsupported(self, name):
         def named(*args, **kwargs):
@@ -125,70 +91,79 @@ class Parser:
 
         return named
 
-    def _play_move(self, color, pos, **extras):
-        if pos or extras:
-            if pos == "tt":
-                pos = Empty.PASS
-            else:
-                pos = sgf_to_pos(pos) if pos else None
-            self.game.test_move(Move(color, pos, **extras), apply_result=True)
+    def _play_move(self, color, values):
+        pos = values[0]
+        if not pos or pos == "tt" and self.game.boardsize <= 19:
+            pos = Empty.PASS
+        else:
+            pos = sgf_to_pos(pos)
+        if self.lazy:
+            child = self.node.children.get(pos)
+            if child is None or child.color != color:
+                child = Move(color, pos, parent=self.node)
+            self.node = child
         else:
-            self.game.test_move(Move(color, Empty.PASS, **extras), apply_result=True)
+            self.game.test_move(Move(color, pos), apply_result=True)
+            self.node = self.game.cursor
 
-    def _do_deco(self, val, marker):
-        parts = val.split("][")
-        for pos in parts:
+    def _do_deco(self, values, marker):
+        for pos in values:
             coord = sgf_to_pos(pos)
-            self.game.cursor.extras.decorations[coord] = marker
+            self.node.extras.decorations[coord] = marker
 
-    def do_tr(self, val):
-        self._do_deco(val, TR)
+    def do_tr(self, values):
+        self._do_deco(values, TR)
 
-    def do_ma(self, val):
-        self._do_deco(val, MA)
+    def do_ma(self, values):
+        self._do_deco(values, MA)
 
-    def do_cr(self, val):
-        self._do_deco(val, CR)
+    def do_cr(self, values):
+        self._do_deco(values, CR)
 
-    def do_sq(self, val):
-        self._do_deco(val, SQ)
+    def do_sq(self, values):
+        self._do_deco(values, SQ)
 
-    def do_b(self, pos):
-        self._play_move(BLACK, pos)
+    def do_b(self, values):
+        self._play_move(BLACK, values)
 
-    def do_w(self, pos):
-        self._play_move(WHITE, pos)
+    def do_w(self, values):
+        self._play_move(WHITE, values)
 
-    def do_c(self, cmd):
-        self.game.cursor.extras.comments.append(cmd)
+    def do_c(self, values):
+        self.node.extras.comments.extend(values)
 
-    def do_gc(self, cmd):
-        self.do_c(cmd)
+    def do_gc(self, values):
+        self.do_c(values)
 
-    def do_lb(self, cmd):
-        parts = cmd.split("][")
-        for part in parts:
-            pos, char = part.split(":")
+    def do_lb(self, values):
+        for part in values:
+            pos, char = part.split(":", 1)
             coord = sgf_to_pos(pos)
-            self.game.cursor.extras.decorations[coord] = char
+            self.node.extras.decorations[coord] = char
 
-    def _do_a(self, cmd, color):
-        parts = cmd.split("][")
-        coords = [sgf_to_pos(pos) for pos in parts]
+    def _do_a(self, values, color):
+        coords = [sgf_to_pos(pos) for pos in values]
         # self._play_move(None, None, stones={color: coords})
-        self.game.cursor.extras.stones[color] = coords
+        replaced = bool(self.node.extras.stones[color])
+        self.node.extras.stones[color] = coords
+        self._setup_changed(replaced)
 
-    def do_ab(self, cmd):
-        self._do_a(cmd, BLACK)
+    def do_ab(self, values):
+        self._do_a(values, BLACK)
 
-    def do_aw(self, cmd):
-        self._do_a(cmd, WHITE)
+    def do_aw(self, values):
+        self._do_a(values, WHITE)
 
-    def do_ae(self, cmd):
-        parts = cmd.split("][")
-        for pos in parts:
+    def do_ae(self, values):
+        for pos in values:
             coord = sgf_to_pos(pos)
-            self.game.cursor.extras.empty.add(coord)
+            self.node.extras.empty.add(coord)
+        self._setup_changed()
+
+    def _setup_changed(self, replaced=False):
+        if not self.lazy:
+            # the node is the cursor, its new stones are put on the board
+            self.game._setup_changed(replaced)
 
     def __getitem__(self, name):
         if name.startswith("do_"):
@@ -199,7 +174,59 @@ class Parser:
         return None
 
 
-def parse(sgftxt: str, defaults: Dict) -> Game:
-    parser = Parser(sgftxt, defaults)
+def parse(
+    sgftxt: Union[str, bytes, mmap.mmap],
+    defaults: Dict,
+    board_cls: Type[BaseBoard] = Board,
+    ruleset_cls: Optional[Type[BaseRuleset]] = None,
+    lazy: bool = False,
+) -> Game:
+    """
+    The game of the sgf. A `lazy` game is at the root, its boards are computed
+    when the moves are visited.
+    """
+    parser = Parser(
+        sgftxt, defaults, board_cls=board_cls, ruleset_cls=ruleset_cls, lazy=lazy
+    )
     parser.parse()
     return parser.game
+
+
+def read(
+    path: str,
+    defaults: Dict,
+    board_cls: Type[BaseBoard] = Board,
+    ruleset_cls: Optional[Type[BaseRuleset]] = None,
+    lazy: bool = False,
+) -> Game:
+    """
+    The game of a sgf file, parsed from a memory map of it. Only the values are
+    decoded, with the `CA` charset of the file.
+    """
+    with open(path, "rb") as fileobj:
+        if not os.fstat(fileobj.fileno()).st_size:
+            # an empty file can not be mapped
+            return parse(b"", defaults, board_cls, ruleset_cls, lazy)
+        with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse(data, defaults, board_cls, ruleset_cls, lazy)
+
+
+def iter_games(
+    fileobj: TextIO,
+    defaults: Optional[Dict] = None,
+    board_cls: Type[BaseBoard] = Board,
+    ruleset_cls: Optional[Type[BaseRuleset]] = None,
+    lazy: bool = True,
+) -> Iterator[Game]:
+    """
+    The games of a sgf collection (many game trees in one file), one at a time.
+    Only the text of the current game tree is held in memory.
+    """
+    for sgftxt in game_trees(fileobj):
+        yield parse(
+            sgftxt,
+            defaults or {},
+            board_cls=board_cls,
+            ruleset_cls=ruleset_cls,
+            lazy=lazy,
+        )
@@ -0,0 +1,69 @@
+import pytest
+
+from pygoban.sgf.columnar import PASS, MainLines, load_npy, write_shards
+from pygoban.sgf.lexer import SGFError
+from pygoban.status import BLACK, WHITE
+
+collection = (
+    "(;SZ[9]PB[Anna]AB[aa][bb];W[cc];B[];W[ba](;B[ab];W[tt])(;B[ii]))\n"
+    "(;CA[Latin-1]SZ[19]C[a ( comment];B[tt];W[sa])"
+).encode("latin-1", "replace")
+
+
+def test_main_lines():
+    lines = MainLines()
+    assert lines.add(collection) == 2
+    assert len(lines) == 2
+    points, colors = lines.game(0)
+    assert list(points) == [2 * 9 + 2, PASS, 0 * 9 + 1, 1 * 9 + 0, PASS]
+    assert list(colors) == [
+        WHITE.intval,
+        BLACK.intval,
+        WHITE.intval,
+        BLACK.intval,
+        WHITE.intval,
+    ]
+    assert lines.infos[0]["AB"] == ["aa", "bb"]
+    points, colors = lines.game(1)
+    assert list(points) == [PASS, 18]
+    assert list(lines.boardsizes) == [9, 19]
+    assert list(lines.offsets) == [0, 5, 7]
+
+
+def test_main_lines_trail_bytes():
+    lines = MainLines()
+    assert lines.add("(;CA[Big5]SZ[9]PB[許];B[aa];W[bb])".encode("big5")) == 1
+    assert lines.infos[0]["PB"] == "許"
+    assert list(lines.game(0)[0]) == [0, 1 * 9 + 1]
+
+
+def test_main_lines_broken():
+    lines = MainLines()
+    for sgf in (b"(;SZ[9];B[aa];W[bb]", b"(;SZ[9];B[aa];W[b])", b"(;SZ[9];C[x)"):
+        with pytest.raises(SGFError):
+            lines.add(b"(;SZ[9];B[ab])" + sgf)
+    assert lines.add(b"(;SZ[9];B[cc])") == 1
+    assert len(lines) == 1
+    assert list(lines.points) == [2 * 9 + 2]
+    assert list(lines.offsets) == [0, 1]
+
+
+def test_shards(tmp_path):
+    sgf = tmp_path / "games.sgf"
+    sgf.write_bytes(collection)
+    (tmp_path / "empty.sgf").write_bytes(b"")
+    (tmp_path / "broken.sgf").write_bytes(b"(;SZ[9];B[aa];W[b])")
+    paths = [str(sgf), str(tmp_path / "empty.sgf"), str(sgf)]
+    paths += [str(tmp_path / "broken.sgf"), str(sgf)]
+    shards = write_shards(paths, str(tmp_path), games_per_shard=4)
+    assert len(shards) == 2
+    first = MainLines.load(shards[0])
+    assert len(first) == 4
+    assert list(first.game(2)[0]) == list(MainLines.load(shards[1]).game(0)[0])
+    assert first.infos[1]["CA"] == "Latin-1"
+    assert first.points.readonly
+    with open(shards[0] + ".points.npy", "rb") as fileobj:
+        header = fileobj.read(128)
+    assert header.startswith(b"\x93NUMPY\x01\x00")
+    assert b"'shape': (14,)" in header
+    assert len(load_npy(shards[1] + ".offsets.npy")) == 3
@@ -1,6 +1,13 @@
-from pygoban.status import BLACK
-from pygoban.sgf import reader
+import io
+from typing import Iterator
+
+import pytest
 
+from pygoban.status import BLACK, EMPTY, WHITE
+from pygoban.coords import pos_to_sgf
+from pygoban.sgf.lexer import SGFError, game_trees
+from pygoban.sgf import reader
+from pygoban.rulesets.standard import ChineseRuleset, JapaneseRuleset
 
 sgf1 = """(;GM[1]FF[4]CA[UTF-8]AP[CGoban:3]ST[2]
 RU[Japanese]SZ[19]KM[0.00]
@@ -16,3 +23,173 @@ def test_read():
     game = reader.parse(sgf1, {})
     assert game.boardsize == 19
     assert game.prisoners[BLACK] == 1
+    assert isinstance(game.ruleset, JapaneseRuleset)
+
+
+def test_read_ruleset():
+    game = reader.parse("(;SZ[9]RU[Chinese];B[aa])", {})
+    assert isinstance(game.ruleset, ChineseRuleset)
+    assert game.ruleset.path
+    game = reader.parse("(;SZ[9]RU[Chinese];B[aa])", {}, ruleset_cls=JapaneseRuleset)
+    assert isinstance(game.ruleset, JapaneseRuleset)
+
+
+def test_read_large_board():
+    game = reader.parse("(;SZ[52];B[ZZ];W[aA];B[tt])", {})
+    assert game.board[51][51] == BLACK
+    assert game.board[26][0] == WHITE
+    assert game.board[19][19] == BLACK
+
+
+def test_read_compact():
+    game = reader.parse("(;SZ[9];B[ab]C[comment](;W[aa])(;W[ba]))", {})
+    first = game.root.children[(1, 0)]
+    assert first.extras.comments == ["comment"]
+    assert not first.children[(0, 0)].has_extras
+    assert first.pos is reader.sgf_to_pos("ab")
+    assert not hasattr(first, "__dict__")
+
+
+def test_read_root_variations():
+    game = reader.parse("(;SZ[9](;B[aa];W[bb])(;B[cc]))", {})
+    assert set(game.root.children) == {(0, 0), (2, 2)}
+
+
+def test_read_escapes():
+    game = reader.parse(
+        "(;SZ[9]\n;B[aa]C[a \\] b \\\\ c\\\nd]LB[bb:x\\]]\n;W[bb])",
+        {},
+    )
+    first = game.root.children[(0, 0)]
+    assert first.extras.comments == ["a ] b \\ cd"]
+    assert first.extras.decorations[(1, 1)] == "x]"
+    assert (1, 1) in first.children
+
+
+def test_read_multiple_values():
+    game = reader.parse("(;SZ[9]AB[aa] [bb]\n[cc]AddWhite[dd];B[ee])", {})
+    assert game.root.extras.stones[BLACK] == [(0, 0), (1, 1), (2, 2)]
+    assert game.root.extras.stones[WHITE] == [(3, 3)]
+
+
+def test_read_infos_only():
+    game = reader.parse("(;SZ[13]KM[7.5])", {})
+    assert game.boardsize == 13
+    assert not game.root.children
+
+
+def test_read_invalid():
+    for sgf in ("(;SZ[9];B[aa", "(;SZ[9];B)", "(;SZ[9];B[aa]{)"):
+        with pytest.raises(SGFError):
+            reader.parse(sgf, {})
+
+
+def test_read_lazy():
+    sgf = "(;SZ[9]AB[cc];W[ba];B[aa](;W[ab];B[bb])(;W[bb]C[variation]))"
+    game = reader.parse(sgf, {}, lazy=True)
+    assert game.cursor is game.root
+    assert game.board[2][2] == BLACK
+    first = game.root.children[(0, 1)]
+    assert first.hash is None
+    capture = first.children[(0, 0)].children[(1, 0)]
+    game._set_cursor(capture)
+    assert game.board[0][0] == EMPTY
+    assert game.prisoners[WHITE] == 1
+    assert first.hash is not None
+    variation = capture.parent.children[(1, 1)]
+    assert variation.extras.comments == ["variation"]
+    game.step_back()
+    game.step_forward(variation)
+    assert game.board[0][0] == BLACK
+    eager = reader.parse(sgf, {})
+    eager._set_cursor(eager.root.children[(0, 1)].children[(0, 0)].children[(1, 1)])
+    assert game.board.snapshot() == eager.board.snapshot()
+
+
+def test_read_setup_every_node(monkeypatch):
+    # the stones are put on the board, the moves before are not played again
+    points = [pos_to_sgf(divmod(index, 25)) for index in range(600)]
+    sgf = (
+        "(;SZ[25]"
+        + "".join(
+            f";{'BW'[index % 2]}[{points[2 * index]}]AW[{points[2 * index + 1]}]"
+            for index in range(300)
+        )
+        + ")"
+    )
+    rebuilds = []
+    rebuild = reader.Game._rebuild
+    monkeypatch.setattr(
+        reader.Game, "_rebuild", lambda game, move: rebuilds.append(rebuild(game, move))
+    )
+    game = reader.parse(sgf, {})
+    assert len(rebuilds) <= 1
+    assert game.cursor.depth == 300
+    lazy = reader.parse(sgf, {}, lazy=True)
+    last = lazy.root
+    while last.children:
+        last = next(iter(last.children.values()))
+    lazy._set_cursor(last)
+    assert lazy.board.snapshot() == game.board.snapshot()
+    assert last.hash == game.cursor.hash
+
+    # the stones of the second AB replace the first ones
+    game = reader.parse("(;SZ[9](;B[aa]AB[cc];W[ee])(;B[aa]AB[dd]))", {})
+    game._set_cursor(game.root.children[(0, 0)])
+    assert (game.board[2][2], game.board[3][3]) == (EMPTY, BLACK)
+
+
+def test_iter_games():
+    collection = (
+        "(;SZ[9]PB[first]C[a ) in a comment];B[aa](;W[bb])(;W[cc]))\n"
+        "(;SZ[13]PB[second]C[\\]];B[aa])\n"
+        "(;SZ[19]PB[third])"
+    )
+    games = reader.iter_games(io.StringIO(collection * 100))
+    assert isinstance(games, Iterator)
+    games = list(games)
+    assert len(games) == 300
+    assert [game.infos["PB"] for game in games[:3]] == ["first", "second", "third"]
+    assert [game.boardsize for game in games[:3]] == [9, 13, 19]
+    assert len(games[0].root.children[(0, 0)].children) == 2
+    assert games[1].root.extras.comments == ["]"]
+
+
+def test_game_trees_chunks():
+    collection = "(;C[(\\]];B[aa])\n(;B[bb](;W[cc])(;W[dd]))" * 3
+    expected = ["(;C[(\\]];B[aa])", "(;B[bb](;W[cc])(;W[dd]))"] * 3
+    for chunk_size in (1, 2, 3, 5, 1 << 16):
+        trees = game_trees(io.StringIO(collection), chunk_size=chunk_size)
+        assert list(trees) == expected
+
+
+def test_read_file(tmp_path):
+    path = tmp_path / "game.sgf"
+    sgf = "(;CA[Shift_JIS]SZ[9]PB[本因坊秀策]C[黒\\]\\\n番];B[aa];W[bb])"
+    path.write_bytes(sgf.encode("shift_jis"))
+    game = reader.read(str(path), {})
+    assert game.infos["PB"] == "本因坊秀策"
+    assert game.root.extras.comments == ["黒]番"]
+    assert game.board[1][1] == WHITE
+    # ISO-8859-1 without CA
+    path.write_bytes("(;SZ[9]PW[Jörg];B[aa])".encode("latin-1"))
+    game = reader.read(str(path), {}, lazy=True)
+    assert game.infos["PW"] == "Jörg"
+    assert game.root.children[(0, 0)].color == BLACK
+    path.write_bytes(b"")
+    assert reader.read(str(path), {"SZ": 13}).boardsize == 13
+
+
+def test_read_trail_bytes(tmp_path):
+    # the second bytes of 表 and 許 are "\\"
+    path = tmp_path / "game.sgf"
+    for sgf, codec, comments in (
+        ("(;CA[Shift_JIS]SZ[9]PB[表]C[表\\]];B[aa])", "shift_jis", ["表]"]),
+        ("(;CA[Big5]SZ[9]PB[許];B[aa])", "big5", []),
+    ):
+        path.write_bytes(sgf.encode(codec))
+        for lazy in (False, True):
+            game = reader.read(str(path), {}, lazy=lazy)
+            assert game.infos["PB"] == sgf[sgf.index("PB[") + 3]
+            assert game.root.extras.comments == comments
+            assert game.root.children[(0, 0)].color == BLACK
@@ -1,5 +1,8 @@
+import io
+
+from pygoban.move import Empty
 from pygoban.status import BLACK
-from pygoban.sgf import writer
+from pygoban.sgf import reader, writer
 from pygoban.game import Game
 from pygoban import Pos
 
@@ -10,3 +13,49 @@ def test_write():
     sgf = writer.to_sgf(game.infos, game.root)
     assert ";SZ[9]" in sgf
     assert ";B[aa]" in sgf
+
+
+def test_write_large_board():
+    game = Game(SZ=52)
+    game.play(BLACK, Pos(51, 26))
+    sgf = writer.to_sgf(game.infos, game.root)
+    assert ";B[AZ]" in sgf
+
+
+def test_write_escapes():
+    game = Game(SZ=9)
+    game.play(BLACK, Pos(0, 0))
+    game.cursor.extras.comments.append("a ] b \\")
+    sgf = writer.to_sgf(game.infos, game.root)
+    assert "C[a \\] b \\\\]" in sgf
+    assert reader.parse(sgf, {}).cursor.extras.comments == ["a ] b \\"]
+
+
+def test_write_setup():
+    sgf = "(;SZ[9]AB[aa][bb]AW[cc];B[dd]AE[aa]LB[ee:x]TR[ff][gg](;W[ee])(;W[ff]))"
+    game = reader.parse(sgf, {}, lazy=True)
+    written = writer.to_sgf(game.infos, game.root)
+    assert "AB[aa][bb]AW[cc]" in written
+    assert ";B[dd]AE[aa]LB[ee:x]TR[ff][gg]" in written
+    assert writer.to_sgf(game.infos, reader.parse(written, {}).root) == written
+
+
+def test_write_stream():
+    game = Game(SZ=9, CA="Shift_JIS")
+    with game.batch():
+        for index in range(5000):
+            game.play(game.nextcolor, Empty.PASS)
+    fileobj = io.StringIO()
+    assert writer.to_sgf(game.infos, game.root, fileobj) is None
+    sgf = fileobj.getvalue()
+    assert sgf.count(";W[]") == 2500
+    assert "CA[UTF-8]" in sgf
+    assert sgf == writer.to_sgf(game.infos, game.root)
+
+
+def test_write_file(tmp_path):
+    game = Game(SZ=9, PW="Łukasz")
+    path = tmp_path / "game.sgf"
+    with open(path, "w", encoding="utf-8") as fileobj:
+        writer.to_sgf(game.infos, game.root, fileobj)
+    assert reader.read(str(path), {}).infos["PW"] == "Łukasz"
@@ -1,61 +1,85 @@
-from typing import Dict
-from pygoban.move import Move, Empty
+import io
+from typing import Dict, List, Optional, TextIO, Tuple, Union
+from pygoban.move import Move, MoveExtras, Empty
 from pygoban.coords import pos_to_sgf
+from pygoban.status import BLACK, WHITE
 from . import INFO_KEYS, TR, MA, CR, SQ
 
 SYM_MAP = {TR: "TR", MA: "MA", CR: "CR", SQ: "SQ"}
 
 
-def _to_sgf(move: Move, boardsize, level=0, txt=""):
-    if move.color:
-        dist = "\t" * level
-        if not move.is_empty:
-            coord = pos_to_sgf(move.pos)
-        elif move.pos == Empty.UNDO:
-            return txt, level
-        else:
-            coord = ""
-        txt += f"\n{dist};{move.color.shortval}[{coord}]"
+def escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("]", "\\]")
+
 
-    for comment in move.extras.comments:
-        txt += f"C[{comment}]"
+def _property(ident: str, values: List[str]) -> str:
+    return ident + "[" + "][".join(values) + "]" if values else ""
 
-    collect = {}
-    for key, value in move.extras.decorations.items():
+
+def _extras_to_sgf(extras: MoveExtras) -> str:
+    collect: Dict[str, List[str]] = {
+        "AB": sorted(pos_to_sgf(pos) for pos in extras.stones[BLACK]),
+        "AW": sorted(pos_to_sgf(pos) for pos in extras.stones[WHITE]),
+        "AE": sorted(pos_to_sgf(pos) for pos in extras.empty),
+        "C": [escape(comment) for comment in extras.comments],
+    }
+    for key, value in extras.decorations.items():
         if cmd := SYM_MAP.get(value):
-            collect.setdefault(cmd, [])
-            collect[cmd].append(pos_to_sgf(key))
-        else:
-            collect.setdefault("LB", [])
-            collect["LB"].append(pos_to_sgf(key) + ":" + value)
-    for key, value in collect.items():
-        if cmd in SYM_MAP.values():
-            txt += cmd + "[" + "][".join(value) + "]"
+            collect.setdefault(cmd, []).append(pos_to_sgf(key))
         else:
-            txt += "LB" + "[" + "][".join(value) + "]"
-
-    has_variation = len(move.children) > 1
-    for child in move.children.values():
-        if has_variation:
-            dist = "\t" * level
-            txt += f"\n{dist}("
-            level += 1
-        txt, level = _to_sgf(child, boardsize, level, txt)
-        if has_variation:
-            level -= 1
-            dist = "\t" * level
-            txt += f"\n{dist})"
-    return txt, level
-
-
-def to_sgf(infos: Dict, root: Move):
-    # print("infos", infos, root)
-    txt = "(;"
+            collect.setdefault("LB", []).append(pos_to_sgf(key) + ":" + escape(value))
+    return "".join(_property(ident, values) for ident, values in collect.items())
+
+
+def _node_to_sgf(move: Move, level: int) -> str:
+    txt = ""
+    if move.color:
+        dist = "\t" * level
+        coord = "" if move.is_empty else pos_to_sgf(move.pos)
+        txt = f"\n{dist};{move.color.shortval}[{coord}]"
+    if move.has_extras:
+        txt += _extras_to_sgf(move.extras)
+    return txt
+
+
+def to_sgf(infos: Dict, root: Move, fp: Optional[TextIO] = None) -> Optional[str]:
+    """
+    Write the game tree to `fp` node by node, without recursion. The text is
+    returned if there is no `fp`.
+    """
+    if fp is None:
+        buffer = io.StringIO()
+        to_sgf(infos, root, buffer)
+        return buffer.getvalue()
+    charset = getattr(fp, "encoding", None)
+    if "CA" in infos or charset:
+        # the values are text, the file is written in the encoding of `fp`.
+        # Without CA a file is read as ISO-8859-1
+        infos = {**infos, "CA": charset or "UTF-8"}
+    fp.write("(;")
     for key in INFO_KEYS:
         val = infos.get(key)
         if val is not None:
-            txt += f"{key}[{val}]"
+            fp.write(f"{key}[{escape(str(val))}]")
 
-    txt += _to_sgf(root, boardsize=infos["SZ"])[0]
-    txt += ")"
-    return txt
+    stack: List[Tuple[Union[Move, str], int]] = [(root, 0)]
+    """Moves with their level, and the parentheses of the variations"""
+    while stack:
+        item, level = stack.pop()
+        if isinstance(item, str):
+            fp.write(item)
+            continue
+        fp.write(_node_to_sgf(item, level))
+        children = [
+            child for child in item.children.values() if child.pos != Empty.UNDO
+        ]
+        if len(children) == 1:
+            stack.append((children[0], level))
+            continue
+        dist = "\t" * level
+        for child in reversed(children):
+            stack.append((f"\n{dist})", level))
+            stack.append((child, level + 1))
+            stack.append((f"\n{dist}(", level))
+    fp.write(")")
+    return None
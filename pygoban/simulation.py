@@ -0,0 +1,151 @@
+"""
+Headless games for testing rules and engines at scale: no gui, no event
+threads and no gtp. Moves come from plain callables, independent games
+can be spread over all cores with `run_games`.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Callable, Dict, List, Optional, Type, Union
+
+from . import END_BY_RESIGN, Pos
+from .board import BOARDS, get_neighbors
+from .counting import count
+from .game import Game
+from .move import Empty, Move
+from .rulesets import BaseRuleset
+from .status import BLACK, WHITE, Status, get_othercolor
+
+MoveSource = Callable[[Game, Status], Union[Pos, Empty]]
+"""Returns the move of `color` in the game: a point, Empty.PASS or Empty.RESIGN"""
+
+
+class RandomMoves:
+    """
+    Random legal moves that do not fill own eyes, passes if there are none.
+    Uses the `random` module if no `rand` is given, so `run_games` can seed
+    every game.
+    """
+
+    def __init__(self, rand: Optional[random.Random] = None):
+        self.rand = rand
+
+    def __call__(self, game: Game, color: Status) -> Union[Pos, Empty]:
+        board = game.board
+        boardsize = board.boardsize
+        neighbors = get_neighbors(boardsize)
+        candidates = [
+            index for index, legal in enumerate(game.legal_moves(color)) if legal
+        ]
+        (self.rand or random).shuffle(candidates)
+        for index in candidates:
+            pos = divmod(index, boardsize)
+            if not all(board[x][y] == color for x, y in neighbors[pos]):
+                return pos
+        return Empty.PASS
+
+
+@dataclass
+class SimulationResult:
+    moves: int = 0
+    seconds: float = 0.0
+    color: Optional[Status] = None
+    """The winner, None for jigo"""
+    msg: str = ""
+    """Like `Ended.msg`, e.g. {color}+R"""
+    points: Dict[Status, float] = field(default_factory=dict)
+    prisoners: Dict[Status, int] = field(default_factory=dict)
+
+    @property
+    def moves_per_second(self):
+        return self.moves / self.seconds if self.seconds else 0.0
+
+
+def simulate(
+    black: MoveSource,
+    white: MoveSource,
+    boardsize: int = 9,
+    komi: float = 6.5,
+    board: str = "list",
+    ruleset_cls: Type[BaseRuleset] = BaseRuleset,
+    max_moves: Optional[int] = None,
+) -> SimulationResult:
+    """
+    Play one game until two passes in a row, a resign or `max_moves`
+    (default: 3 * boardsize²), then count it. Illegal moves raise the
+    `RuleViolation` of the ruleset.
+    """
+    game = Game(
+        board_cls=BOARDS[board], ruleset_cls=ruleset_cls, SZ=boardsize, KM=str(komi)
+    )
+    sources = {BLACK: black, WHITE: white}
+    max_moves = max_moves or 3 * boardsize * boardsize
+    result = SimulationResult()
+    start = time.perf_counter()
+    color = game.nextcolor
+    with game.batch():
+        while result.moves < max_moves:
+            pos = sources[color](game, color)
+            if pos == Empty.RESIGN:
+                result.color = get_othercolor(color)
+                result.msg = END_BY_RESIGN
+                break
+            game.apply_result(game.test_move(Move(color, pos)))
+            result.moves += 1
+            if pos == Empty.PASS and game.cursor.parent.is_pass:
+                break
+            color = get_othercolor(color)
+        if not result.msg:
+            score(game, result)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def score(game: Game, result: SimulationResult):
+    """
+    Count the game into `result`. Only stones in pass-alive territory are
+    dead, all others are alive.
+    """
+    game.settle()
+    counted = game.ruleset.set_result(count(game.board))
+    result.points = counted.points
+    result.prisoners = counted.prisoners
+    totals = {
+        color: counted.points[color] + counted.prisoners[color]
+        for color in (BLACK, WHITE)
+    }
+    if totals[BLACK] != totals[WHITE]:
+        result.color = BLACK if totals[BLACK] > totals[WHITE] else WHITE
+        margin = abs(totals[BLACK] - totals[WHITE])
+        result.msg = "{color}+%s" % margin
+    else:
+        result.msg = "0"
+
+
+def _simulate_seeded(args):
+    seed, black, white, kwargs = args
+    random.seed(seed)
+    return simulate(black, white, **kwargs)
+
+
+def run_games(
+    games: int,
+    black: MoveSource,
+    white: MoveSource,
+    processes: Optional[int] = None,
+    seed: int = 0,
+    **kwargs,
+) -> List[SimulationResult]:
+    """
+    Simulate `games` independent games in a pool of `processes` (default: all
+    cores). The move sources must be picklable. The `random` module is seeded
+    with `seed + index` for every game, so the results do not depend on the
+    number of processes.
+    """
+    tasks = [(seed + index, black, white, kwargs) for index in range(games)]
+    if processes == 1:
+        return [_simulate_seeded(task) for task in tasks]
+    with Pool(processes) as pool:
+        return pool.map(_simulate_seeded, tasks, chunksize=max(1, games // 64))
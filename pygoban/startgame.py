@@ -6,11 +6,13 @@ import sys
 from typing import Any, Dict, Optional, Type
 
 from . import InputMode, get_argparser, getconfig
+from .board import BOARDS
 from .controller import ControllerMixin as _Controller
 from .events import Counted, CursorChanged, Ended
 from .game import Game
 from .player import GTPPlayer, Player
-from .sgf.reader import parse
+from .rulesets.standard import get_ruleset_cls
+from .sgf.reader import read
 from .status import BLACK, WHITE, Status
 from .timesettings import TimeSettings
 
@@ -47,6 +49,8 @@ def initgame(
     sgf_file=None,
     handicap=None,
     time=None,
+    board="list",
+    ruleset=None,
     extra_controller_kwargs: Optional[Dict] = None
     # **kwargs
 ):
@@ -58,19 +62,25 @@ def initgame(
     defaults = {
         "SZ": boardsize or int(config["PYGOBAN"]["boardsize"]),
         "KM": komi or config["PYGOBAN"]["komi"],
-        "RU": "default",
+        "RU": ruleset or "default",
         "PB": players[BLACK].name,
         "PW": players[WHITE].name,
         "GN": "-".join([players[col].name for col in (BLACK, WHITE)]),
     }
     if sgf_file:
-        with open(sgf_file) as fileobj:
-            sgftxt = fileobj.read()
-            game = parse(sgftxt, defaults=defaults)
-            for color, key in ((BLACK, "PB"), (WHITE, "PW")):
-                players[color].name = game.infos.get(key, players[color].name)
+        game = read(
+            sgf_file,
+            defaults=defaults,
+            board_cls=BOARDS[board],
+            ruleset_cls=get_ruleset_cls(ruleset) if ruleset else None,
+            lazy=True,
+        )
+        if ruleset:
+            game.infos["RU"] = ruleset
+        for color, key in ((BLACK, "PB"), (WHITE, "PW")):
+            players[color].name = game.infos.get(key, players[color].name)
     else:
-        game = Game(HA=handicap, **defaults)
+        game = Game(board_cls=BOARDS[board], HA=handicap, **defaults)
 
     controller_kwargs = dict(
         black=players[BLACK],
@@ -90,7 +100,10 @@ def initgame(
     if extra_controller_kwargs:
         controller_kwargs.update(extra_controller_kwargs)
     controller = controller_cls(**controller_kwargs)
-    game.add_listener(controller, [CursorChanged, Counted, Ended], wait=True)
+    # the gui only shows the latest cursor, but the clocks need every move
+    game.add_listener(
+        controller, [CursorChanged, Counted, Ended], coalesce=not (nogui or time)
+    )
     for col in (BLACK, WHITE):
         game.add_listener(players[col], [CursorChanged, Counted])
     if root:
@@ -119,6 +132,8 @@ def startgame(
     handicap=None,
     time=None,
     mode=InputMode.PLAY,
+    board="list",
+    ruleset=None,
 ):
 
     players = {}
@@ -140,6 +155,8 @@ def startgame(
         sgf_file=sgf_file,
         handicap=handicap,
         time=time,
+        board=board,
+        ruleset=ruleset,
         controller_cls=get_control_cls(nogui),
         input_mode=mode,
     )
@@ -153,6 +170,10 @@ def startgame(
 
 
 def startpygoban():
+    if sys.argv[1:2] == ["ingest"]:
+        from .ingest import main
+
+        sys.exit(main(sys.argv[2:]))
     parser = get_argparser()
     args = parser.parse_args()
     args.mode = InputMode[args.mode]
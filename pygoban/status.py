@@ -33,6 +33,10 @@ class Status:
         """Every status object is a singelton"""
         return self
 
+    def __reduce__(self):
+        """Unpickle to the singleton, e.g. in results from other processes"""
+        return get_status, (self.intval,)
+
 
 KO = Status(-1, "Ko", "?")
 EMPTY = Status(0, "Empty", "+")
@@ -42,7 +46,16 @@ DEAD_BLACK = Status(3, "b")
 DEAD_WHITE = Status(4, "w")
 BLACK_LIB = Status(5, "B")
 WHITE_LIB = Status(6, "W")
-STATUS = {int(sts): sts for sts in (KO, EMPTY, BLACK, WHITE, DEAD_BLACK, DEAD_WHITE)}
+STATUS = {
+    int(sts): sts
+    for sts in (KO, EMPTY, BLACK, WHITE, DEAD_BLACK, DEAD_WHITE, BLACK_LIB, WHITE_LIB)
+}
+STONE_COLORS = {BLACK: BLACK, WHITE: WHITE, DEAD_BLACK: BLACK, DEAD_WHITE: WHITE}
+"""Color of the chain a stone belongs to, dead or alive"""
+
+
+def get_status(intval: int) -> Status:
+    return STATUS[intval]
 
 
 def get_othercolor(color: Status) -> Status:
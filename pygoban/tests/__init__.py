@@ -60,9 +60,7 @@ class ControlledGame:
             infos=infos,
         )
         self.callback = callback
-        self.game.add_listener(
-            self.controller, event_classes=[CursorChanged], wait=True
-        )
+        self.game.add_listener(self.controller, event_classes=[CursorChanged])
         for color in (BLACK, WHITE):
             player = self.controller.players[color]
             player.tests_controller = self
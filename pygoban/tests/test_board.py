@@ -1,7 +1,7 @@
 import unittest
-from pygoban.board import Board
+from pygoban.board import ArrayBoard, Board
 from pygoban.move import Move
-from pygoban.status import BLACK, WHITE
+from pygoban.status import BLACK, EMPTY, WHITE
 
 
 class BoardTest(unittest.TestCase):
@@ -44,6 +44,59 @@ class BoardTest(unittest.TestCase):
 
         self.play(moves)
 
+    def test_chains(self):
+        moves = (
+            (0, 0, BLACK, 0),
+            (1, 0, WHITE, 0),
+            (0, 1, BLACK, 0),
+            (1, 1, WHITE, 0),
+            (5, 5, BLACK, 0),
+            (0, 2, WHITE, 2),
+        )
+        self.play(moves[:3])
+        self.assertIs(self.board.chain((0, 0)), self.board.chain((0, 1)))
+        self.assertEqual(self.board.analyze((0, 0))[3], {(1, 1), (0, 2)})
+
+        self.play(moves[3:])
+        self.assertIsNone(self.board.chain((0, 0)))
+        self.assertEqual(self.board.analyze((0, 2))[3], {(0, 1), (1, 2), (0, 3)})
+        self.assertIs(self.board.chain((1, 0)), self.board.chain((1, 1)))
+        _, group, _, libs, _ = self.board.analyze((1, 0))
+        self.assertEqual(group, {(1, 0), (1, 1)})
+        self.assertEqual(libs, {(0, 0), (0, 1), (2, 0), (2, 1), (1, 2)})
+
+    def test_make_unmake(self):
+        self.play(
+            (
+                (0, 0, BLACK, 0),
+                (1, 0, WHITE, 0),
+                (0, 1, BLACK, 0),
+                (1, 1, WHITE, 0),
+            )
+        )
+        before = [list(row) for row in self.board]
+        chain = self.board.chain((1, 0))
+        libs = self.board.analyze((1, 0))[3]
+
+        with self.board.try_move(Move(WHITE, (0, 2))) as result:
+            self.assertEqual(result.killed, {(0, 0), (0, 1)})
+            self.assertEqual(self.board[0][0], EMPTY)
+            self.assertIn((0, 0), self.board.analyze((1, 0))[3])
+
+        self.assertEqual([list(row) for row in self.board], before)
+        self.assertIs(self.board.chain((1, 0)), chain)
+        self.assertEqual(self.board.analyze((1, 0))[3], libs)
+
+        result = self.board.make(Move(WHITE, (0, 2)))
+        self.board.apply_result(result)
+        self.assertIsNone(result.journal)
+        self.assertEqual(self.board[0][1], EMPTY)
+
+
+class ArrayBoardTest(BoardTest):
+    def setUp(self):
+        self.board = ArrayBoard(9)
+
 
 if __name__ == "__main__":
     unittest.main()
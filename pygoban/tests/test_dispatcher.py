@@ -0,0 +1,99 @@
+import threading
+from pygoban.dispatcher import Dispatcher
+from pygoban.events import Counted, CursorChanged
+from pygoban.game import Game
+
+
+class Listener:
+    def __init__(self, gate=None):
+        self.events = []
+        self.threads = set()
+        self.gate = gate
+        self.started = threading.Event()
+
+    def handle_game_event(self, event):
+        self.started.set()
+        if self.gate:
+            self.gate.wait()
+        self.threads.add(threading.get_ident())
+        self.events.append(event)
+
+
+def test_order():
+    game = Game(SZ=9)
+    listener = Listener()
+    game.add_listener(listener, [CursorChanged])
+    for x in range(9):
+        game.play(game.nextcolor, (x, 0))
+    assert game.dispatcher.flush(timeout=5)
+    assert [event.cursor.pos for event in listener.events] == [(x, 0) for x in range(9)]
+    assert len(listener.threads) == 1
+    metrics = game.dispatcher.metrics()[listener]
+    assert metrics.dispatched == 9
+    assert metrics.depth == 0
+    assert metrics.coalesced == 0
+
+
+def test_coalesce():
+    game = Game(SZ=9)
+    gate = threading.Event()
+    slow, fast = Listener(gate), Listener()
+    game.add_listener(slow, [CursorChanged, Counted], coalesce=True)
+    game.add_listener(fast, [CursorChanged])
+    game.play(game.nextcolor, (0, 0))
+    assert slow.started.wait(timeout=5)
+    for x in range(1, 5):
+        game.play(game.nextcolor, (x, 0))
+    game.dispatcher.fire(Counted(board=game.board))
+    game.play(game.nextcolor, (0, 8))
+    gate.set()
+    assert game.dispatcher.flush(timeout=5)
+
+    assert len(fast.events) == 6
+    assert [type(event) for event in slow.events] == [
+        CursorChanged,
+        CursorChanged,
+        Counted,
+        CursorChanged,
+    ]
+    merged = slow.events[1]
+    assert merged.cursor.pos == (4, 0)
+    assert merged.changed == {(x, 0) for x in range(1, 5)}
+    metrics = game.dispatcher.metrics()[slow]
+    assert metrics.coalesced == 3
+    assert metrics.max_depth >= 5
+
+
+def test_failing_listener():
+    class Failing(Listener):
+        def handle_game_event(self, event):
+            super().handle_game_event(event)
+            raise ValueError()
+
+    dispatcher = Dispatcher()
+    listener = Failing()
+    dispatcher.add_listener(listener, [Counted])
+    dispatcher.fire(Counted(board=None))
+    dispatcher.fire(Counted(board=None))
+    assert dispatcher.flush(timeout=5)
+    assert len(listener.events) == 2
+    assert dispatcher.metrics()[listener].failed == 2
+
+
+def test_batch():
+    game = Game(SZ=9)
+    listener = Listener()
+    game.add_listener(listener, [CursorChanged])
+    with game.batch():
+        for x in range(5):
+            game.play(game.nextcolor, (x, 0))
+        with game.batch():
+            game._set_cursor(game.cursor.parent)
+            game.play(game.nextcolor, (8, 8))
+    game.step_back()
+    assert game.dispatcher.flush(timeout=5)
+    assert len(listener.events) == 2
+    summary = listener.events[0]
+    assert summary.cursor.pos == (8, 8)
+    assert summary.changed is None
+    assert listener.events[1].changed == {(8, 8)}
@@ -1,18 +1,38 @@
 import unittest
-from pygoban.status import BLACK, WHITE, EMPTY
+from pygoban.status import BLACK, WHITE, EMPTY, DEAD_WHITE
+from pygoban.board import ArrayBoard, Board
 from pygoban.game import Game
 from pygoban.controller import Controller
 from pygoban.player import Player
-from pygoban.rulesets import BaseRuleset, RuleViolation, KoViolation, OccupiedViolation
+from pygoban.rulesets import (
+    BaseRuleset,
+    RuleViolation,
+    KoViolation,
+    OccupiedViolation,
+    SuperkoViolation,
+)
+from pygoban.rulesets.superko import (
+    PositionalSuperkoRuleset,
+    SituationalSuperkoRuleset,
+)
+from pygoban.checkpoints import Checkpoints
+from pygoban.rulesets.standard import score_all
 from pygoban.coords import gtp_coords
+from pygoban.counting import counted_groups
 from pygoban.move import Empty
+from pygoban.sgf.reader import parse
 
 
 class BaseGameTest(unittest.TestCase):
     ruleset_cls = BaseRuleset
+    board_cls = Board
+
+    boardsize = 9
 
     def setUp(self):
-        self.game = Game(SZ=9)
+        self.game = Game(
+            board_cls=self.board_cls, ruleset_cls=self.ruleset_cls, SZ=self.boardsize
+        )
 
     def play_move(self, x, y, color=None):
         color = color or self.game.nextcolor
@@ -96,6 +116,20 @@ class GameTest(BaseGameTest):
         self.game.undo()
         self.assertEqual(1, self.game.prisoners[WHITE])
 
+    def test_legal_moves(self):
+        self.play_moves(((0, 1), (0, 0), (1, 2), (1, 1), (0, 3), (0, 2)))
+        mask = self.game.legal_moves()
+        self.assertEqual(len(mask), 81)
+        self.assertEqual(sum(mask), 81 - 5 - 1)
+        # ko
+        self.assertEqual(mask[0 * 9 + 1], 0)
+        self.assertEqual(mask[4 * 9 + 4], 1)
+
+        self.play_moves(((4, 4), (5, 5)))
+        self.assertEqual(self.game.legal_moves()[0 * 9 + 1], 1)
+        # occupied
+        self.assertEqual(self.game.legal_moves()[0 * 9 + 0], 0)
+
     def test_occupied(self):
         self.play_move(
             4,
@@ -128,12 +162,229 @@ class GameTest(BaseGameTest):
         self.assertEqual(EMPTY, self.game.board[3][3])
         self.assertEqual(WHITE, self.game.nextcolor)
 
+    def test_hash(self):
+        self.play_moves(((0, 1), (0, 0), (1, 0)))
+        self.assertEqual(self.game.cursor.hash, self.game.board.hash)
+        self.assertNotEqual(self.game.cursor.hash, self.game.cursor.parent.hash)
+        captured = self.game.cursor.hash
+
+        self.game._set_cursor(self.game.root)
+        self.assertEqual(self.game.board.hash, self.game.root.hash)
+        self.play_moves(((1, 0), (0, 0), (0, 1)))
+        self.assertEqual(self.game.cursor.hash, captured)
+
+    def test_checkpoints(self):
+        self.game.checkpoints = Checkpoints(interval=2)
+        self.game.walk_limit = 0
+        moves = ((0, 1), (0, 0), (1, 2), (1, 1), (0, 3), (0, 2), (4, 4))
+        self.play_moves(moves)
+        cursor = self.game.cursor
+        board = [list(row) for row in self.game.board]
+
+        self.game._set_cursor(self.game.root)
+        self.game._set_cursor(cursor)
+        self.assertEqual(len(self.game.checkpoints), 3)
+        self.game._set_cursor(cursor.parent)
+        self.assertEqual(self.game.ruleset.ko, (0, 1))
+        with self.assertRaises(KoViolation):
+            self.play_move(0, 1, BLACK)
+
+        self.game._set_cursor(cursor)
+        self.assertEqual([list(row) for row in self.game.board], board)
+        self.assertEqual(self.game.board.hash, cursor.hash)
+        self.assertEqual(1, self.game.prisoners[WHITE])
+
+        self.game.checkpoints = Checkpoints(interval=1, max_bytes=1000)
+        self.game._set_cursor(self.game.root)
+        self.game._set_cursor(cursor)
+        self.assertLess(self.game.checkpoints.used, 1000)
+        self.assertIn(cursor, self.game.checkpoints)
+
+    def test_step(self):
+        moves = ((0, 1), (0, 0), (1, 2), (1, 1), (0, 3), (0, 2), (4, 4))
+        self.play_moves(moves)
+        board = self.game.board
+        path = self.game.get_path()
+        self.assertEqual(path[5].diff.points, {(0, 2), (0, 1)})
+
+        positions = []
+        while self.game.cursor.parent:
+            positions.append(([list(row) for row in board], dict(self.game.prisoners)))
+            self.game.step_back()
+        self.assertIs(self.game.board, board)
+        self.assertEqual(self.game.board.hash, self.game.root.hash)
+
+        for move in path:
+            self.game.step_forward(move)
+            self.assertEqual(
+                ([list(row) for row in board], dict(self.game.prisoners)),
+                positions.pop(),
+            )
+        self.assertIs(self.game.board, board)
+        self.game.step_back()
+        self.assertEqual(self.game.ruleset.ko, (0, 1))
+
+    def test_step_after_count(self):
+        self.play_moves(((0, 1), (0, 0), (1, 2), (4, 4)))
+        events = []
+        self.game.fire_event = events.append
+        self.game.count()
+        self.assertFalse(self.game._counted)
+        # the territory is shown on every point, all of them are updated
+        self.game.step_back()
+        self.assertIsNone(events[-1].changed)
+        self.game.step_back()
+        self.assertEqual(events[-1].changed, {(1, 2)})
+        self.game.count()
+        self.play_move(4, 4)
+        self.assertIsNone(events[-1].changed)
+
+    def test_settle(self):
+        # black lives with two eyes on the left, white (0, 0) is in one of them
+        blacks = [(1, y) for y in range(9)] + [(0, 4)]
+        whites = [(0, 0)] + [(5, y) for y in range(9)]
+        self.play_moves(move for pair in zip(blacks, whites) for move in pair)
+        self.game.count()
+        territory = self.game.territories.last
+        self.assertEqual(self.game.board[0][0], DEAD_WHITE)
+        self.assertEqual(territory.points, {BLACK: 8, WHITE: 27})
+        self.assertEqual(territory.prisoners, {BLACK: 1, WHITE: 0})
+
+        results = score_all(territory, self.game.prisoners, komi=6.5, handicap=3)
+        self.assertEqual(results["Japanese"].points, {BLACK: 8, WHITE: 33.5})
+        self.assertEqual(results["Japanese"].prisoners, {BLACK: 1, WHITE: 0})
+        self.assertEqual(results["Chinese"].points, {BLACK: 8 + 10, WHITE: 45.5})
+        self.assertEqual(results["Chinese"].prisoners, {BLACK: 0, WHITE: 0})
+        self.assertEqual(results["AGA"].points, {BLACK: 8 + 10, WHITE: 44.5})
+
+        self.game.toggle_status((1, 3))
+        self.game.toggle_status((0, 0))
+        self.assertEqual(self.game.board[1][3], BLACK)
+        self.assertEqual(self.game.board[0][0], DEAD_WHITE)
+        self.game.toggle_status((5, 3))
+        self.assertEqual(self.game.territories.last.points, {BLACK: 81 - 10, WHITE: 0})
+
+    def test_walk(self):
+        self.play_moves(((0, 1), (0, 0), (1, 2), (1, 1), (0, 3), (0, 2)))
+        ko = self.game.cursor
+        self.game._set_cursor(ko.parent.parent)
+        self.play_moves(((5, 5), (6, 6)))
+        other = self.game.cursor
+        board = self.game.board
+
+        self.assertIs(ko.common_ancestor(other), ko.parent.parent)
+        self.assertIs(other.ancestor(2), ko.ancestor(2))
+        self.assertEqual(ko.depth, 6)
+        self.assertEqual(ko.get_path()[-1], ko)
+
+        self.game._set_cursor(ko)
+        self.assertIs(self.game.board, board)
+        self.assertEqual(1, self.game.prisoners[WHITE])
+        self.assertEqual(self.game.ruleset.ko, (0, 1))
+        self.game._set_cursor(other)
+        self.assertEqual(0, self.game.prisoners[WHITE])
+        self.assertEqual(self.game.board[6][6], WHITE)
+        self.assertEqual(self.game.board[0][1], BLACK)
+
     def test_pass(self):
         self.game.play(BLACK, (0, 1))
         self.game.play(WHITE, Empty.PASS)
         self.game.play(BLACK, (0, 2))
 
 
+class ArrayBoardGameTest(GameTest):
+    board_cls = ArrayBoard
+
+
+class LargeBoardTest(BaseGameTest):
+    boardsize = 52
+
+    def test_count(self):
+        for x in range(self.boardsize):
+            self.play_move(x, 25, BLACK)
+            self.play_move(x, 26, WHITE)
+        groups = counted_groups(self.game.board)
+        self.assertEqual(
+            sorted((str(group["owner"]), len(group["coords"])) for group in groups),
+            [("Black", 52 * 25), ("White", 52 * 25)],
+        )
+
+    def test_toggle_status(self):
+        for x in range(self.boardsize):
+            self.play_move(x, 25, BLACK)
+            self.play_move(x, 26, WHITE)
+        self.play_move(40, 40, BLACK)
+        self.play_move(10, 10, WHITE)
+        snapshot = self.game.board.snapshot()
+        territories = self.game.territories
+
+        self.game.count()
+        territory = territories.last
+        self.assertEqual(self.game.board.snapshot(), snapshot)
+        self.assertEqual(territory.owner((0, 0)), None)
+        self.assertEqual(territory.points, {BLACK: 0, WHITE: 0})
+
+        self.game.toggle_status((10, 10))
+        territory = territories.last
+        self.assertEqual(self.game.board[10][10], DEAD_WHITE)
+        self.assertEqual(territory.owner((0, 0)), BLACK)
+        self.assertEqual(territory.owner((10, 10)), BLACK)
+        self.assertEqual(territory.points, {BLACK: 52 * 25, WHITE: 0})
+        self.assertEqual(territory.prisoners, {BLACK: 1, WHITE: 0})
+        # only the region around the toggled stone was labeled again
+        self.assertIsNone(territory.regions[0])
+        self.assertEqual(territory.labels[0], len(territory.regions) - 1)
+        self.assertEqual(territory.labels[10 * 52 + 10], territory.labels[0])
+
+        self.game.toggle_status((40, 40))
+        self.assertEqual(territories.last.points, {BLACK: 52 * 25, WHITE: 52 * 25})
+        self.game.toggle_status((10, 10))
+        self.assertEqual(territories.last.points, {BLACK: 0, WHITE: 52 * 25})
+        self.assertEqual(len(territories), 4)
+
+
+class SuperkoTest(BaseGameTest):
+    ruleset_cls = PositionalSuperkoRuleset
+    boardsize = 4
+    # White recaptures two stones and repeats the position after move 16
+    moves = (
+        (3, 0), (2, 2), (2, 1), (3, 3), (2, 3), (0, 0), (1, 1), (0, 1), (0, 2), (1, 2),
+        (3, 1), (2, 0), (0, 3), (1, 3), (1, 0), (2, 3), (0, 2), (0, 0), (0, 3),
+    )  # fmt: skip
+
+    def test_superko(self):
+        self.play_moves(self.moves)
+        with self.assertRaises(SuperkoViolation):
+            self.play_move(0, 1, WHITE)
+
+        self.game._set_cursor(self.game.root)
+        self.assertEqual(len(self.game.ruleset.path), 1)
+        self.play_moves(self.moves)
+        self.assertEqual(len(self.game.ruleset.path), len(self.moves) + 1)
+        with self.assertRaises(SuperkoViolation):
+            self.play_move(0, 1, WHITE)
+        self.assertEqual(self.game.legal_moves(WHITE)[0 * 4 + 1], 0)
+
+    def test_setup_position(self):
+        sgf = "(;SZ[9]AB[cc][gg];W[ee])"
+        for lazy in (False, True):
+            game = parse(sgf, {}, ruleset_cls=self.ruleset_cls, lazy=lazy)
+            game._set_cursor(game.root.children[(4, 4)])
+            ruleset = game.ruleset
+            self.assertEqual(len(ruleset.path), 2)
+            self.assertIn(ruleset.key(game.root.hash, None), ruleset.seen)
+            self.assertNotIn(ruleset.key(Game(SZ=9).root.hash, None), ruleset.seen)
+
+    def test_basic_ko_allows_repetition(self):
+        self.game = Game(SZ=self.boardsize)
+        self.play_moves(self.moves)
+        self.play_move(0, 1, WHITE)
+
+
+class SituationalSuperkoTest(SuperkoTest):
+    ruleset_cls = SituationalSuperkoRuleset
+
+
 class DenyAllRuleset(BaseRuleset):
     def validate(self, *args, **kwargs):
         raise RuleViolation("BAD")
@@ -0,0 +1,40 @@
+from pygoban.ingest import find_sgf_files, ingest, main
+
+
+def write_files(directory):
+    (directory / "sub").mkdir()
+    for index in range(6):
+        path = directory / f"game{index}.sgf"
+        path.write_text("(;SZ[5]KM[0.5]RE[B+R];B[cc];W[aa];B[ab];W[];B[ba])")
+    (directory / "sub" / "broken.sgf").write_text("(;SZ[9];B[aa")
+    (directory / "sub" / "illegal.sgf").write_text("(;SZ[9];B[aa];W[aa])")
+    (directory / "notes.txt").write_text("(;SZ[9])")
+
+
+def test_ingest(tmp_path):
+    write_files(tmp_path)
+    paths = find_sgf_files(str(tmp_path))
+    assert len(paths) == 8
+    results = list(ingest(paths, processes=2, chunksize=3))
+    assert [result.path for result in results] == paths
+    assert list(ingest(paths, processes=1)) == results
+    game = results[0]
+    assert game.moves == 5
+    assert game.boardsize == 5
+    assert game.result == "B+R"
+    assert game.counted == "B+22.5"
+    assert not game.error and not game.violation
+    broken, illegal = results[-2:]
+    assert broken.error.startswith("SGFError")
+    assert illegal.moves == 2
+    assert illegal.violation == "2: OccupiedViolation"
+
+
+def test_main(tmp_path, capsys):
+    write_files(tmp_path)
+    summary = tmp_path / "summary.csv"
+    assert main([str(tmp_path), "--processes", "1", "--summary", str(summary)]) == 0
+    lines = summary.read_text().splitlines()
+    assert lines[0].startswith("path,size,boardsize,moves,result")
+    assert len(lines) == 9
+    assert "8 files" in capsys.readouterr().err
@@ -0,0 +1,62 @@
+import random
+import pytest
+from pygoban.move import Empty
+from pygoban.rulesets import RuleViolation
+from pygoban.rulesets.superko import PositionalSuperkoRuleset, SuperkoViolation
+from pygoban.simulation import RandomMoves, run_games, simulate
+from pygoban.status import BLACK, WHITE
+
+
+class Scripted:
+    def __init__(self, *moves):
+        self.moves = list(moves)
+
+    def __call__(self, game, color):
+        return self.moves.pop(0) if self.moves else Empty.PASS
+
+
+def test_simulate():
+    result = simulate(RandomMoves(random.Random(1)), RandomMoves(random.Random(2)))
+    assert result.moves > 50
+    assert result.color in (BLACK, WHITE)
+    assert result.points[BLACK] + result.points[WHITE] > 0
+    assert result.moves_per_second > 0
+
+
+def test_score_and_resign():
+    result = simulate(Scripted((4, 4)), Scripted(), boardsize=5, komi=0.5)
+    assert result.moves == 3
+    assert result.color == BLACK
+    assert result.points == {BLACK: 24, WHITE: 0.5}
+    assert result.msg == "{color}+23.5"
+
+    result = simulate(Scripted((4, 4)), Scripted(Empty.RESIGN), boardsize=5)
+    assert result.color == BLACK
+    assert result.msg == "{color}+R"
+
+
+def test_illegal_move():
+    with pytest.raises(RuleViolation):
+        simulate(Scripted((0, 0)), Scripted((0, 0)), boardsize=5)
+
+
+def test_superko():
+    # the position after W (0, 1) repeats the one after move 16
+    moves = (
+        (3, 0), (2, 2), (2, 1), (3, 3), (2, 3), (0, 0), (1, 1), (0, 1), (0, 2), (1, 2),
+        (3, 1), (2, 0), (0, 3), (1, 3), (1, 0), (2, 3), (0, 2), (0, 0), (0, 3), (0, 1),
+    )  # fmt: skip
+    with pytest.raises(SuperkoViolation):
+        simulate(
+            Scripted(*moves[::2]),
+            Scripted(*moves[1::2]),
+            boardsize=4,
+            ruleset_cls=PositionalSuperkoRuleset,
+        )
+
+
+def test_run_games():
+    results = run_games(4, RandomMoves(), RandomMoves(), processes=2, boardsize=7)
+    again = run_games(4, RandomMoves(), RandomMoves(), processes=1, boardsize=7)
+    assert [result.moves for result in results] == [result.moves for result in again]
+    assert all(result.color in (BLACK, WHITE, None) for result in results)